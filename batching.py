@@ -0,0 +1,138 @@
+# batching.py
+import concurrent.futures
+import json
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("Batching")
+
+# Delimitador de cada documento no texto do prompt em lote
+DOC_MARKER = "=== {doc_id} ==="
+
+
+def document_id(index: int) -> str:
+    return f"DOC_{index}"
+
+
+def batch_text(texts: Dict[str, str]) -> str:
+    """
+    Texto de vários documentos para o lugar de {text} no prompt, com o aviso
+    de que a resposta deve ser um objeto JSON com uma chave por documento.
+    """
+    ids = ", ".join(texts)
+    parts = [
+        f"[Atenção: abaixo há {len(texts)} documentos distintos, cada um iniciado por "
+        f"uma linha '{DOC_MARKER.format(doc_id='DOC_n')}'. Responda com um único objeto JSON "
+        f"cujas chaves são os identificadores ({ids}) e cujos valores são o JSON no formato "
+        "acima referente a cada documento. Não misture informações de documentos diferentes.]"
+    ]
+    for doc_id, text in texts.items():
+        parts.append(f"{DOC_MARKER.format(doc_id=doc_id)}\n{text}")
+    return "\n\n".join(parts)
+
+
+def split_batch_response(response_text: str, ids: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Separa a resposta do lote em um JSON por documento. Documentos ausentes ou
+    com valor que não seja um objeto ficam com None (o chamador os reenvia sozinhos).
+    """
+    results = {doc_id: None for doc_id in ids}
+    try:
+        data = json.loads(response_text)
+    except json.JSONDecodeError:
+        # Mesmo reparo da resposta individual: o objeto entre a primeira e a última chave
+        start, end = response_text.find('{'), response_text.rfind('}') + 1
+        if start < 0 or end <= start:
+            return results
+        try:
+            data = json.loads(response_text[start:end])
+        except json.JSONDecodeError:
+            return results
+    if not isinstance(data, dict):
+        return results
+    for doc_id in ids:
+        value = data.get(doc_id)
+        if isinstance(value, dict):
+            results[doc_id] = json.dumps(value, ensure_ascii=False, indent=2)
+    return results
+
+
+class SmallDocumentBatcher:
+    """
+    Junta documentos curtos, vindos de threads diferentes do mesmo processo, em
+    uma única requisição ao LLM. Cada thread chama submit() e espera a sua parte.
+    O lote é enviado quando atinge max_docs ou max_tokens (tokens de texto), ou
+    max_wait segundos depois do primeiro documento entrar. `send` recebe
+    {id: texto} e devolve {id: json ou None}; o envio roda em threads próprias.
+    """
+
+    def __init__(self, send: Callable[[Dict[str, str]], Dict[str, Optional[str]]],
+                 max_tokens: int, max_docs: int, max_wait: float, max_concurrent: int = 4):
+        self.send = send
+        self.max_tokens = max_tokens
+        self.max_docs = max_docs
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._pending: List[dict] = []
+        self._pending_tokens = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrent, thread_name_prefix="llm-batch"
+        )
+
+    def submit(self, text: str, tokens: int) -> Optional[str]:
+        """JSON do documento extraído no lote, ou None se o lote não resolveu este documento."""
+        entry = {'text': text, 'tokens': tokens, 'done': threading.Event(), 'result': None}
+        ready = []
+        with self._lock:
+            if self._pending and self._pending_tokens + tokens > self.max_tokens:
+                ready.append(self._take())
+            self._pending.append(entry)
+            self._pending_tokens += tokens
+            if len(self._pending) >= self.max_docs or self._pending_tokens >= self.max_tokens:
+                ready.append(self._take())
+            elif len(self._pending) == 1:
+                timer = threading.Timer(self.max_wait, self._flush_if_pending, args=(self._pending,))
+                timer.daemon = True
+                timer.start()
+        for batch in ready:
+            self._executor.submit(self._flush, batch)
+        entry['done'].wait()
+        return entry['result']
+
+    def _take(self) -> List[dict]:
+        batch = self._pending
+        self._pending = []
+        self._pending_tokens = 0
+        return batch
+
+    def _flush_if_pending(self, batch: List[dict]):
+        # Timer de um lote que já saiu por tamanho: nada a fazer
+        with self._lock:
+            if self._pending is not batch:
+                return
+            self._take()
+        self._flush(batch)
+
+    def _flush(self, batch: List[dict]):
+        try:
+            if len(batch) == 1:
+                # Sozinho no lote: segue pelo caminho normal (mesmo prompt e chave de cache)
+                return
+            texts = {document_id(i): entry['text'] for i, entry in enumerate(batch, start=1)}
+            try:
+                results = self.send(texts)
+            except Exception as e:
+                logger.warning(f"Falha no lote de {len(batch)} documentos; reenviando um a um: {e}")
+                return
+            for doc_id, entry in zip(texts, batch):
+                entry['result'] = results.get(doc_id)
+            missing = sum(1 for entry in batch if entry['result'] is None)
+            if missing:
+                logger.warning(f"{missing} de {len(batch)} documentos sem resposta no lote; serão reenviados sozinhos.")
+        finally:
+            for entry in batch:
+                entry['done'].set()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,10 @@
+# benchmarks/__init__.py
+"""
+Benchmarks do pipeline com um corpus sintético de contratos.
+
+ - corpus: gera PDFs de contratos (páginas e itens configuráveis) e o JSON esperado;
+ - stubs: cliente LLM local com latência configurável e conexão de banco substituta;
+ - run: mede cada etapa isoladamente e grava o resultado em JSON para comparação.
+
+Uso: python -m benchmarks.run --docs 20 --pages 8 --items 30 --out bench.json
+"""
@@ -0,0 +1,199 @@
+# benchmarks/corpus.py
+import json
+import os
+import random
+from typing import List, Tuple
+
+UNIDADES = ["UN", "CX", "KG", "L", "M", "PCT", "RESMA", "SERVIÇO"]
+PRODUTOS = [
+    "Papel A4 75g/m²", "Caneta esferográfica azul", "Toner para impressora laser",
+    "Álcool em gel 70%", "Luva de procedimento", "Cadeira giratória", "Notebook 14 polegadas",
+    "Cabo de rede CAT6", "Detergente neutro", "Serviço de manutenção predial",
+    "Água mineral 20L", "Seringa descartável 5ml", "Monitor 24 polegadas", "Grampeador de mesa",
+]
+ORGAOS = [
+    ("Ministério da Saúde", "MS"), ("Universidade Federal do Pará", "UFPA"),
+    ("Instituto Federal de Goiás", "IFG"), ("Fundação Nacional de Saúde", "FUNASA"),
+]
+EMPRESAS = [
+    "Distribuidora Alfa Ltda", "Comercial Beta EIRELI", "Gama Serviços S.A.",
+    "Delta Suprimentos Ltda", "Ômega Tecnologia Ltda",
+]
+# Texto de cláusula padrão, usado para encher as páginas sem dados úteis
+BOILERPLATE = (
+    "A CONTRATADA obriga-se a cumprir fielmente o presente contrato, respondendo pelos "
+    "danos causados diretamente à Administração ou a terceiros, nos termos da Lei nº 14.133, "
+    "de 2021, e das demais normas aplicáveis, cabendo à fiscalização acompanhar a execução."
+)
+
+LINES_PER_PAGE = 60
+CHARS_PER_LINE = 95
+
+
+def _cnpj(rng: random.Random) -> str:
+    d = [rng.randint(0, 9) for _ in range(12)]
+    for weights in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        r = sum(x * w for x, w in zip(d, weights)) % 11
+        d.append(0 if r < 2 else 11 - r)
+    s = "".join(map(str, d))
+    return f"{s[:2]}.{s[2:5]}.{s[5:8]}/{s[8:12]}-{s[12:]}"
+
+
+def _money(value: float) -> str:
+    inteiro, dec = f"{value:.2f}".split(".")
+    grupos = []
+    while inteiro:
+        grupos.insert(0, inteiro[-3:])
+        inteiro = inteiro[:-3]
+    return "R$ " + ".".join(grupos) + "," + dec
+
+
+def make_contract(index: int, items: int, rng: random.Random) -> dict:
+    """JSON esperado (mesmo formato do prompt) de um contrato sintético."""
+    orgao, sigla = rng.choice(ORGAOS)
+    itens = []
+    for n in range(1, items + 1):
+        quantidade = rng.randint(1, 500)
+        unitario = round(rng.uniform(1, 5000), 2)
+        itens.append({
+            "descricao": f"{rng.choice(PRODUTOS)} - lote {n}",
+            "especificacao": None,
+            "unidade_medida": rng.choice(UNIDADES),
+            "quantidade": str(quantidade),
+            "valor_unitario": _money(unitario),
+            "valor_total": _money(quantidade * unitario),
+            "catmat_catser": str(rng.randint(100000, 999999)),
+            "tipo": "Material",
+            "locais_execucao_entrega": None,
+        })
+    return {
+        "numero_contrato": f"{index:03d}/2024",
+        "tipo_instrumento": "Contrato",
+        "processo_administrativo": f"{rng.randint(10000, 99999)}.{rng.randint(100000, 999999)}/2024-{rng.randint(10, 99)}",
+        "data_celebracao": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+        "fonte_preco": "Contrato",
+        "referencia_contrato": f"{index:03d}/2024",
+        "anexo_contrato": None,
+        "status_extracao": "Sucesso",
+        "orgao_contratante": {"razao_social": orgao, "sigla": sigla, "cnpj": _cnpj(rng)},
+        "empresa_contratada": {"razao_social": rng.choice(EMPRESAS), "cnpj": _cnpj(rng)},
+        "itens": itens,
+    }
+
+
+def _wrap(text: str) -> List[str]:
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > CHARS_PER_LINE:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def contract_pages(contract: dict, pages: int) -> List[List[str]]:
+    """Texto do contrato em páginas: cabeçalho, partes, itens, cláusulas padrão e assinatura."""
+    oc, ec = contract["orgao_contratante"], contract["empresa_contratada"]
+    head = [
+        f"CONTRATO Nº {contract['numero_contrato']}",
+        f"PROCESSO SEI Nº {contract['processo_administrativo']}",
+        "",
+        f"CONTRATANTE: {oc['razao_social']} - {oc['sigla']}, inscrito no CNPJ sob o nº {oc['cnpj']}.",
+        f"CONTRATADA: {ec['razao_social']}, inscrita no CNPJ sob o nº {ec['cnpj']}.",
+        "",
+        "CLÁUSULA PRIMEIRA - DO OBJETO",
+    ]
+    for n, item in enumerate(contract["itens"], 1):
+        head.append(
+            f"Item {n}: {item['descricao']} | Unidade: {item['unidade_medida']} | "
+            f"Quantidade: {item['quantidade']} | Valor unitário: {item['valor_unitario']} | "
+            f"Valor total: {item['valor_total']} | CATMAT {item['catmat_catser']}"
+        )
+    tail = [
+        "",
+        f"Brasília, {contract['data_celebracao']}.",
+        "Documento assinado eletronicamente.",
+    ]
+
+    lines = []
+    for line in head:
+        lines.extend(_wrap(line) or [""])
+    clause = 2
+    while len(lines) + len(tail) < pages * LINES_PER_PAGE:
+        lines.append(f"CLÁUSULA {clause}ª - DAS OBRIGAÇÕES")
+        lines.extend(_wrap(BOILERPLATE))
+        clause += 1
+    lines = lines[:max(pages * LINES_PER_PAGE - len(tail), 0)] + tail
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def write_pdf(path: str, pages: List[List[str]]):
+    """Grava um PDF mínimo (Helvetica, WinAnsiEncoding), uma linha de texto por Tj."""
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # preenchido no fim
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    kids = []
+    for lines in pages:
+        ops = [b"BT /F1 9 Tf 12 TL 40 800 Td"]
+        for line in lines:
+            ops.append(_pdf_string(line) + b" Tj T*")
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = (
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids)
+        + b"] /Count %d >>" % len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref
+    )
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_corpus(out_dir: str, docs: int, pages: int, items: int,
+                    seed: int = 42) -> List[Tuple[str, dict]]:
+    """Gera `docs` PDFs em out_dir (com o JSON esperado ao lado). Retorna [(pdf, esperado)]."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(1, docs + 1):
+        contract = make_contract(index, items, rng)
+        pdf_path = os.path.join(out_dir, f"contrato_{index:04d}.pdf")
+        write_pdf(pdf_path, contract_pages(contract, pages))
+        with open(pdf_path[:-4] + ".expected.json", "w", encoding="utf-8") as f:
+            json.dump(contract, f, ensure_ascii=False, indent=2)
+        corpus.append((pdf_path, contract))
+    return corpus
@@ -0,0 +1,198 @@
+# benchmarks/run.py
+"""
+Mede cada etapa do pipeline isoladamente sobre um corpus sintético:
+ - extract:    pdf_analyzer.extract_text_from_pdf (sem cache de texto)
+ - analyze:    worker.analyze_with_gemini contra o StubGeminiClient (sem cache LLM)
+ - parse:      ContractParser.parse
+ - sql_script: generate_sql_script
+ - persist:    ContractRepository.persist_contract (Postgres com --dsn, senão FakeConnection)
+O resultado vai para um JSON (--out); com --compare, aponta as etapas que
+ficaram mais lentas que a execução de referência além da tolerância.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Executado como "python -m benchmarks.run" a partir da raiz do projeto
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.stubs import FakeConnection, StubGeminiClient
+
+STAGES = ["extract", "analyze", "parse", "sql_script", "persist"]
+
+
+def summarize(samples):
+    """Estatísticas (em ms) de uma lista de durações em segundos."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(samples),
+        "total_s": round(sum(samples), 6),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(docs, pages, items, latency, jitter, repeat, dsn=None, workdir=None, seed=42):
+    import worker
+    from pdf_analyzer import extract_text_from_pdf
+    from repo import ContractParser, ContractRepository, generate_sql_script
+
+    workdir = workdir or tempfile.mkdtemp(prefix="bench_corpus_")
+    corpus = generate_corpus(workdir, docs, pages, items, seed=seed)
+
+    # Sem cache de respostas: cada chamada vai ao stub
+    worker.CONFIG['llm_cache']['enabled'] = False
+    stub = StubGeminiClient(
+        {expected["numero_contrato"]: expected for _, expected in corpus},
+        latency=latency, jitter=jitter, seed=seed
+    )
+    previous_client = worker.set_gemini_client(stub)
+
+    if dsn:
+        import psycopg2
+        conn = psycopg2.connect(dsn)
+    else:
+        conn = FakeConnection()
+    repository = ContractRepository(conn)
+
+    samples = {stage: [] for stage in STAGES}
+    failures = {stage: 0 for stage in STAGES}
+    items_persisted = 0
+    start = time.perf_counter()
+    try:
+        for _ in range(repeat):
+            for pdf_path, _expected in corpus:
+                t = time.perf_counter()
+                text = extract_text_from_pdf(pdf_path, use_cache=False)
+                samples["extract"].append(time.perf_counter() - t)
+
+                t = time.perf_counter()
+                json_str, ok = worker.analyze_with_gemini(text)
+                samples["analyze"].append(time.perf_counter() - t)
+                if not ok:
+                    failures["analyze"] += 1
+                    continue
+
+                t = time.perf_counter()
+                contrato = ContractParser.parse(json_str)
+                samples["parse"].append(time.perf_counter() - t)
+
+                t = time.perf_counter()
+                generate_sql_script(contrato, os.path.basename(pdf_path))
+                samples["sql_script"].append(time.perf_counter() - t)
+
+                t = time.perf_counter()
+                if repository.persist_contract(contrato):
+                    items_persisted += len(contrato.itens)
+                else:
+                    failures["persist"] += 1
+                samples["persist"].append(time.perf_counter() - t)
+    finally:
+        worker.set_gemini_client(previous_client)
+        conn.close()
+    elapsed = time.perf_counter() - start
+
+    processed = docs * repeat
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {
+                "docs": docs, "pages": pages, "items": items, "repeat": repeat,
+                "llm_latency_s": latency, "llm_jitter_s": jitter,
+                "database": "postgres" if dsn else "fake", "seed": seed,
+            },
+        },
+        "stages": {stage: summarize(samples[stage]) for stage in STAGES},
+        "failures": failures,
+        "totals": {
+            "elapsed_s": round(elapsed, 6),
+            "documents": processed,
+            "documents_per_s": round(processed / elapsed, 3) if elapsed else None,
+            "items_persisted": items_persisted,
+            "llm_calls": stub.calls,
+        },
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Etapas cuja média piorou mais que `tolerance` (fração) em relação à referência."""
+    regressions = []
+    for stage in STAGES:
+        now = current["stages"].get(stage, {}).get("mean_ms")
+        before = baseline.get("stages", {}).get(stage, {}).get("mean_ms")
+        if now is None or not before:
+            continue
+        change = (now - before) / before
+        if change > tolerance:
+            regressions.append((stage, before, now, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline com corpus sintético")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="latência do LLM stub (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="variação da latência (s)")
+    parser.add_argument("--dsn", help="Postgres para a etapa persist (senão, conexão substituta)")
+    parser.add_argument("--workdir", help="onde gerar o corpus (padrão: diretório temporário)")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="piora relativa aceitável na comparação (padrão 10%%)")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.docs, args.pages, args.items, args.latency, args.jitter,
+                           args.repeat, dsn=args.dsn, workdir=args.workdir)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    for stage in STAGES:
+        s = result["stages"][stage]
+        if s["count"]:
+            print(f"{stage:<11} n={s['count']:<5} média {s['mean_ms']:9.3f} ms  "
+                  f"p95 {s['p95_ms']:9.3f} ms")
+    print(f"{result['totals']['documents_per_s']} documentos/s -> {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for stage, before, now, change in regressions:
+            print(f"REGRESSÃO {stage}: {before:.3f} ms -> {now:.3f} ms (+{change:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# benchmarks/stubs.py
+import json
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+CONTRACT_NUMBER_RE = re.compile(r"CONTRATO Nº (\S+)")
+
+
+class StubGeminiClient:
+    """
+    Substituto local do GeminiClient (mesma interface: generate(prompt, timeout)).
+    Devolve o JSON esperado do contrato cujo número aparece no prompt, depois de
+    esperar latency ± jitter segundos, simulando o tempo de resposta da API.
+    """
+
+    def __init__(self, responses: Dict[str, dict], latency: float = 0.0,
+                 jitter: float = 0.0, seed: int = 0):
+        self.responses = {k: json.dumps(v, ensure_ascii=False, indent=2) for k, v in responses.items()}
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+        if delay:
+            time.sleep(delay)
+        match = CONTRACT_NUMBER_RE.search(prompt)
+        if match and match.group(1) in self.responses:
+            return self.responses[match.group(1)]
+        # Trecho sem o cabeçalho (análise em partes): JSON vazio no formato do prompt
+        return json.dumps({"itens": [], "status_extracao": "Parcial"})
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    """Cursor que só registra os comandos; fetchone devolve IDs sequenciais."""
+
+    def __init__(self, conn: "FakeConnection"):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements += 1
+
+    def fetchone(self):
+        self.conn.last_id += 1
+        return (self.conn.last_id,)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """
+    Conexão substituta para medir o custo do lado Python da persistência
+    (montagem dos comandos, cache de IDs, controle de transação) sem banco.
+    """
+
+    def __init__(self):
+        self.autocommit = True
+        self.statements = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.last_id = 0
+        self.closed = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
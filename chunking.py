@@ -0,0 +1,206 @@
+# chunking.py
+import json
+import re
+from collections import Counter
+from typing import List
+
+# Início de cláusula ("CLÁUSULA PRIMEIRA", "Cláusula 2ª", ...) no começo de uma linha
+CLAUSE_BOUNDARY = re.compile(r'(?im)^(?=[ \t]*cl[áa]usula\b)')
+
+# Campos de cabeçalho do JSON de contrato reconciliados entre os trechos
+HEADER_FIELDS = [
+    "numero_contrato",
+    "tipo_instrumento",
+    "processo_administrativo",
+    "data_celebracao",
+    "fonte_preco",
+    "referencia_contrato",
+    "anexo_contrato",
+]
+
+ITEM_FIELDS = [
+    "descricao",
+    "especificacao",
+    "unidade_medida",
+    "quantidade",
+    "valor_unitario",
+    "valor_total",
+    "catmat_catser",
+    "tipo",
+    "locais_execucao_entrega",
+]
+
+
+def _split_oversized(segment: str, max_chars: int) -> List[str]:
+    """Quebra um segmento maior que max_chars em quebras de linha (ou à força)."""
+    pieces = []
+    current = ""
+    for line in segment.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """
+    Divide o texto em trechos de até max_chars caracteres, preferindo cortar
+    no início de cláusulas e, quando não for possível, em quebras de linha.
+    Cláusulas consecutivas são agrupadas no mesmo trecho enquanto couberem.
+    """
+    segments = []
+    for segment in CLAUSE_BOUNDARY.split(text):
+        if not segment:
+            continue
+        if len(segment) > max_chars:
+            segments.extend(_split_oversized(segment, max_chars))
+        else:
+            segments.append(segment)
+
+    chunks = []
+    current = ""
+    for segment in segments:
+        if current and len(current) + len(segment) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += segment
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _is_filled(value) -> bool:
+    """Descarta vazios e os placeholders do modelo de JSON do prompt (ex.: 'XXXXXXXXX')."""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        stripped = value.strip()
+        return bool(stripped) and set(stripped.upper()) - set("X./-") != set()
+    return True
+
+
+def _vote(values: list):
+    """Valor preenchido mais frequente; empate resolvido pelo que apareceu primeiro."""
+    filled = [v for v in values if _is_filled(v) and isinstance(v, (str, int, float))]
+    if not filled:
+        return None
+    counts = Counter(filled)
+    best = max(counts.values())
+    for v in filled:
+        if counts[v] == best:
+            return v
+
+
+def _merge_party(parties: List[dict], fields: List[str]) -> dict:
+    """Escolhe a parte (órgão/empresa) pelo CNPJ mais votado e completa campos vazios."""
+    parties = [p for p in parties if isinstance(p, dict)]
+    cnpj = _vote([p.get("cnpj") for p in parties])
+    chosen = [p for p in parties if p.get("cnpj") == cnpj] if cnpj else parties
+    merged = {}
+    for field in fields:
+        merged[field] = _vote([p.get(field) for p in chosen])
+    return merged
+
+
+def _item_key(item: dict) -> tuple:
+    def norm(value):
+        return re.sub(r'\s+', ' ', str(value or '')).strip().lower()
+    return (
+        norm(item.get("descricao")),
+        norm(item.get("catmat_catser")),
+        norm(item.get("quantidade")),
+        norm(item.get("valor_unitario")),
+        norm(item.get("valor_total")),
+    )
+
+
+def _boundary_overlap(previous: List[tuple], current: List[tuple]) -> int:
+    """
+    Quantos itens do início de um trecho repetem, na mesma ordem, os últimos
+    itens do trecho anterior (texto da sobreposição). Itens iguais dentro de
+    um mesmo trecho são itens distintos do contrato e não contam.
+    """
+    for size in range(min(len(previous), len(current)), 0, -1):
+        if previous[-size:] == current[:size]:
+            return size
+    return 0
+
+
+def merge_contract_jsons(json_strs: List[str], partial: bool = False) -> str:
+    """
+    Combina os JSONs parciais (um por trecho) em um único JSON de contrato:
+     - campos de cabeçalho e partes: valor mais votado entre os trechos;
+     - itens: concatenados na ordem dos trechos, sem os repetidos na sobreposição
+       entre um trecho e o seguinte;
+     - status_extracao: "Sucesso" se nenhum trecho falhou e o resultado combinado
+       tem número do contrato, CNPJs das partes e itens; caso contrário "Parcial".
+    """
+    docs = [json.loads(s) for s in json_strs]
+    docs = [d for d in docs if isinstance(d, dict)]
+
+    merged = {}
+    for field in HEADER_FIELDS:
+        merged[field] = _vote([d.get(field) for d in docs])
+
+    merged["orgao_contratante"] = _merge_party(
+        [d.get("orgao_contratante") for d in docs], ["razao_social", "sigla", "cnpj"]
+    )
+    merged["empresa_contratada"] = _merge_party(
+        [d.get("empresa_contratada") for d in docs], ["razao_social", "cnpj"]
+    )
+
+    itens = []
+    previous = []  # (chave, item combinado) do trecho anterior, na ordem
+    for d in docs:
+        current = []
+        chunk_items = [item for item in d.get("itens") or [] if isinstance(item, dict)]
+        repeated = _boundary_overlap([key for key, _ in previous], [_item_key(i) for i in chunk_items])
+        for index, item in enumerate(chunk_items):
+            if index < repeated:
+                # Item repetido na borda entre trechos: completa campos vazios
+                key, existing = previous[len(previous) - repeated + index]
+                for field in ITEM_FIELDS:
+                    if not _is_filled(existing.get(field)) and _is_filled(item.get(field)):
+                        existing[field] = item[field]
+                current.append((key, existing))
+                continue
+            item_key = _item_key(item)
+            item = {field: item.get(field) for field in ITEM_FIELDS}
+            current.append((item_key, item))
+            itens.append(item)
+        previous = current
+    merged["itens"] = itens
+
+    # Cada trecho isolado tende a ser "Parcial"; o status vale para o documento inteiro
+    complete = (
+        _is_filled(merged["numero_contrato"])
+        and _is_filled(merged["orgao_contratante"]["cnpj"])
+        and _is_filled(merged["empresa_contratada"]["cnpj"])
+        and bool(itens)
+    )
+    merged["status_extracao"] = "Sucesso" if complete and not partial else "Parcial"
+
+    if not merged["tipo_instrumento"]:
+        merged["tipo_instrumento"] = "Contrato"
+    if not merged["fonte_preco"]:
+        merged["fonte_preco"] = "Contrato"
+
+    return json.dumps(merged, ensure_ascii=False, indent=2)
+
+
+def chunk_header(index: int, total: int) -> str:
+    """Aviso incluído no texto de cada trecho enviado ao LLM."""
+    return (
+        f"[Trecho {index} de {total} de um documento maior. "
+        "Extraia apenas as informações presentes neste trecho; "
+        "use null nos campos que não aparecem nele.]\n"
+    )
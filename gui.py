@@ -1,11 +1,13 @@
 # gui.py
 import os
+import time
 import threading
 import traceback
+import concurrent.futures
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 
-import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 
 # Importa as classes e métodos do repo.py
 from repo import ContractParser, ContractRepository
@@ -16,14 +18,19 @@ class ExtratorGUI:
     Interface gráfica para:
      - Configurar dados de conexão
      - Selecionar diretório de arquivos JSON
-     - Processar os arquivos em Thread (sem travar a UI)
+     - Processar os arquivos em um pool de threads (sem travar a UI),
+       com uma conexão do pool de BD por thread
+     - Exibir progresso (arquivos/s, itens/s, ETA), permitir cancelar
      - Exibir logs
     """
 
+    # Intervalo mínimo entre atualizações da barra de progresso (segundos)
+    PROGRESS_INTERVAL = 0.2
+
     def __init__(self, master):
         self.master = master
         self.master.title("Extrator de Contratos (com Threads)")
-        self.master.geometry("600x400")
+        self.master.geometry("600x460")
 
         # Frame para dados de conexão
         frame_db = tk.LabelFrame(master, text="Configuração de Banco de Dados")
@@ -62,6 +69,24 @@ class ExtratorGUI:
         self.process_button = tk.Button(frame_buttons, text="Processar Contratos", command=self.start_processing_thread)
         self.process_button.pack(side="left")
 
+        self.cancel_button = tk.Button(frame_buttons, text="Cancelar", command=self.cancel_processing, state=tk.DISABLED)
+        self.cancel_button.pack(side="left", padx=5)
+
+        tk.Label(frame_buttons, text="Workers:").pack(side="left", padx=(10, 0))
+        self.workers_var = tk.StringVar(value="4")
+        tk.Spinbox(frame_buttons, from_=1, to=32, textvariable=self.workers_var, width=3).pack(side="left")
+
+        # Progresso
+        frame_progress = tk.Frame(master)
+        frame_progress.pack(fill="x", padx=10, pady=5)
+
+        self.progress = ttk.Progressbar(frame_progress, mode="determinate")
+        self.progress.pack(fill="x")
+        self.progress_var = tk.StringVar(value="")
+        tk.Label(frame_progress, textvariable=self.progress_var, anchor="w").pack(fill="x")
+
+        self.cancel_event = threading.Event()
+
         # Campo de saída (logs)
         frame_output = tk.LabelFrame(master, text="Log do Processamento")
         frame_output.pack(fill="both", expand=True, padx=10, pady=5)
@@ -92,24 +117,48 @@ class ExtratorGUI:
         user = self.user_var.get().strip()
         password = self.pass_var.get().strip()
 
+        try:
+            n_workers = max(1, int(self.workers_var.get()))
+        except ValueError:
+            messagebox.showerror("Erro", "Número de workers inválido!")
+            return
+
         # Desabilita o botão para evitar cliques duplos
         self.process_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.cancel_event.clear()
 
         # Cria a thread de processamento
         thread = threading.Thread(
             target=self.process_contracts_in_thread,
-            args=(host, port, dbname, user, password, dir_path),
+            args=(host, port, dbname, user, password, dir_path, n_workers),
             daemon=True  # se a GUI fechar, encerra a thread
         )
         thread.start()
 
+    def cancel_processing(self):
+        """Pede o cancelamento: arquivos ainda não iniciados são descartados."""
+        self.cancel_event.set()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.safe_log_output("[INFO] Cancelamento solicitado; aguardando arquivos em andamento...")
+
     def process_contracts_in_thread(self, host: str, port: str, dbname: str,
-                                    user: str, password: str, dir_path: str):
+                                    user: str, password: str, dir_path: str,
+                                    n_workers: int = 1):
         """
         Executado em background para processar arquivos JSON sem travar a GUI.
+        Os arquivos são distribuídos entre n_workers threads; cada thread usa
+        sua própria conexão (do pool) e seu próprio ContractRepository.
         """
+        filenames = [
+            entry.name for entry in os.scandir(dir_path)
+            if entry.is_file() and entry.name.lower().endswith(".json")
+        ]
+        total = len(filenames)
+
         try:
-            conn = psycopg2.connect(
+            pool = ThreadedConnectionPool(
+                1, n_workers,
                 host=host,
                 port=port,
                 dbname=dbname,
@@ -121,32 +170,93 @@ class ExtratorGUI:
             self.enable_process_button()
             return
 
-        repo = ContractRepository(conn)
+        local = threading.local()
+        thread_conns = []
+        conns_lock = threading.Lock()
+
+        def get_repo():
+            # Uma conexão e um repositório por thread do pool
+            if not hasattr(local, "repo"):
+                conn = pool.getconn()
+                with conns_lock:
+                    thread_conns.append(conn)
+                local.repo = ContractRepository(conn)
+            return local.repo
+
+        def process_file(filename):
+            if self.cancel_event.is_set():
+                return filename, None, 0, None
+            full_path = os.path.join(dir_path, filename)
+            try:
+                contrato = ContractParser.parse_file(full_path)
+                ok = get_repo().persist_contract(contrato)
+                return filename, ok, len(contrato.itens), None
+            except Exception:
+                return filename, False, 0, traceback.format_exc()
 
         processed_count = 0
         error_count = 0
-
-        for filename in os.listdir(dir_path):
-            if filename.lower().endswith(".json"):
-                full_path = os.path.join(dir_path, filename)
-                try:
-                    with open(full_path, "r", encoding="utf-8") as f:
-                        json_content = f.read()
-
-                    contrato = ContractParser.parse(json_content)
-                    repo.persist_contract(contrato)
-
+        items_count = 0
+        done = 0
+        start_time = time.time()
+        last_update = 0.0
+        self.update_progress(0, total, "")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(process_file, filename) for filename in filenames]
+            for future in concurrent.futures.as_completed(futures):
+                if self.cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                if future.cancelled():
+                    continue
+
+                filename, ok, n_items, err_msg = future.result()
+                if ok is None:
+                    continue
+                done += 1
+                if ok:
                     processed_count += 1
+                    items_count += n_items
                     self.safe_log_output(f"[OK] {filename} processado com sucesso.")
-                except Exception:
+                else:
                     error_count += 1
-                    err_msg = traceback.format_exc()
-                    self.safe_log_output(f"[ERRO] Falha ao processar '{filename}':\n{err_msg}")
-
-        conn.close()
-        self.safe_log_output(f"\nConcluído. Sucessos: {processed_count}, Erros: {error_count}")
+                    if err_msg:
+                        self.safe_log_output(f"[ERRO] Falha ao processar '{filename}':\n{err_msg}")
+                    else:
+                        self.safe_log_output(f"[ERRO] Falha ao persistir '{filename}' (ver log do extrator).")
+
+                now = time.time()
+                if now - last_update >= self.PROGRESS_INTERVAL or done == total:
+                    last_update = now
+                    elapsed = max(now - start_time, 1e-6)
+                    files_rate = done / elapsed
+                    eta = (total - done) / files_rate if files_rate else 0
+                    self.update_progress(
+                        done, total,
+                        f"{done}/{total} arquivos | {files_rate:.1f} arquivos/s | "
+                        f"{items_count / elapsed:.1f} itens/s | ETA {eta:.0f}s"
+                    )
+
+        for conn in thread_conns:
+            pool.putconn(conn)
+        pool.closeall()
+
+        cancelled = " (cancelado)" if self.cancel_event.is_set() else ""
+        self.safe_log_output(
+            f"\nConcluído{cancelled}. Sucessos: {processed_count}, Erros: {error_count}, "
+            f"Itens: {items_count}, Tempo: {time.time() - start_time:.1f}s"
+        )
         self.enable_process_button()
 
+    def update_progress(self, done: int, total: int, text: str):
+        """Atualiza barra e texto de progresso na thread principal."""
+        def _update():
+            self.progress.config(maximum=max(total, 1), value=done)
+            self.progress_var.set(text)
+
+        self.master.after(0, _update)
+
     def safe_log_output(self, msg: str):
         """
         Adiciona texto ao campo de log de forma segura,
@@ -162,6 +272,7 @@ class ExtratorGUI:
         """Reabilita o botão 'Processar Contratos'."""
         def _enable():
             self.process_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
 
         self.master.after(0, _enable)
 
@@ -0,0 +1,118 @@
+# import_budget.py
+"""
+Mede o tempo de import dos módulos de entrada (master, worker, ...) em
+processos novos, como numa subida a frio ou no respawn de um worker Dask,
+e confere dois limites:
+ - tempo de import (melhor de N execuções) dentro do orçamento do módulo;
+ - nenhuma dependência pesada carregada só pelo import.
+Uso: python import_budget.py [--runs N] [--detail]
+Sai com código 1 se algum limite for ultrapassado.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Orçamento de import por módulo (segundos)
+BUDGETS = {
+    'master': 0.35,
+    'worker': 0.30,
+    'repo': 0.15,
+    'pdf_analyzer': 0.10,
+    'gui': 0.40,
+}
+
+# Dependências que só devem ser carregadas no caminho que as usa
+HEAVY_MODULES = [
+    'dask', 'distributed', 'psycopg2', 'PyPDF2', 'google.generativeai',
+    'boto3', 'botocore', 'sshtunnel', 'paramiko',
+]
+
+# gui.py precisa do Tk para existir; o resto não
+ALLOWED_HEAVY = {
+    'gui': {'tkinter', 'psycopg2'},
+}
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+if 'tkinter' in sys.modules:
+    heavy.append('tkinter')
+print(json.dumps({{'seconds': elapsed, 'heavy': heavy}}))
+"""
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(module, runs=5):
+    """Melhor tempo de import de `module` em `runs` processos novos, e os módulos pesados carregados."""
+    best = None
+    heavy = []
+    code = _CHILD.format(module=module, heavy=HEAVY_MODULES)
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=HERE,
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        data = json.loads(out)
+        if best is None or data['seconds'] < best:
+            best = data['seconds']
+        heavy = data['heavy']
+    return best, heavy
+
+
+def detail(module, top=10):
+    """Os `top` imports mais caros (tempo acumulado), via python -X importtime."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=HERE,
+        capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  <self us> | <cumulative us> | <módulo>"
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de import dos módulos de entrada")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--detail", action="store_true", help="mostra os imports mais caros")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS))
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        budget = BUDGETS.get(module)
+        try:
+            seconds, heavy = measure(module, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<14} ERRO no import:\n{e.stderr}")
+            failed = True
+            continue
+
+        unexpected = [m for m in heavy if m not in ALLOWED_HEAVY.get(module, set())]
+        over = budget is not None and seconds > budget
+        status = "OK" if not over and not unexpected else "FALHOU"
+        failed = failed or status != "OK"
+        budget_txt = f"{budget * 1000:.0f} ms" if budget is not None else "-"
+        print(f"{module:<14} {seconds * 1000:8.1f} ms  (orçamento {budget_txt})  {status}")
+        if unexpected:
+            print(f"{'':<14} módulos pesados carregados no import: {', '.join(unexpected)}")
+        if args.detail:
+            for cumulative_us, name in detail(module):
+                print(f"{'':<14} {cumulative_us / 1000:8.1f} ms  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
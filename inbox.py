@@ -0,0 +1,117 @@
+# inbox.py
+import logging
+import os
+import time
+from fnmatch import fnmatch
+from typing import Dict, List, Optional, Tuple
+
+# inotify é opcional (só Linux); sem ele, o diretório é varrido periodicamente
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+    flags = None
+
+logger = logging.getLogger("InboxWatcher")
+
+# Mesmo com inotify, o diretório é varrido de tempos em tempos (eventos perdidos, overflow)
+FULL_SCAN_INTERVAL = 60.0
+
+
+class InboxWatcher:
+    """
+    Observa um diretório de entrada e devolve os arquivos novos que já
+    terminaram de ser gravados. Usa inotify quando disponível e, senão,
+    varredura periódica. Um arquivo só é entregue depois de ficar `debounce`
+    segundos sem mudar de tamanho nem de data de modificação.
+    Cada arquivo é entregue uma vez enquanto continuar no diretório.
+    """
+
+    def __init__(self, inbox_dir: str, pattern: str = "*.pdf", debounce: float = 5.0,
+                 poll_interval: float = 2.0, use_inotify: bool = True):
+        self.inbox_dir = inbox_dir
+        self.pattern = pattern
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        # caminho -> ((tamanho, mtime), momento em que essa assinatura foi vista)
+        self._candidates: Dict[str, Optional[Tuple[Tuple[int, float], float]]] = {}
+        self._emitted = set()
+        self._last_scan = 0.0
+
+        self._inotify = None
+        if use_inotify and INotify is not None:
+            try:
+                self._inotify = INotify()
+                self._inotify.add_watch(inbox_dir, flags.CLOSE_WRITE | flags.MOVED_TO)
+                logger.info(f"Observando '{inbox_dir}' com inotify.")
+            except OSError as e:
+                logger.warning(f"inotify indisponível ({e}); usando varredura periódica.")
+                self._inotify = None
+        if self._inotify is None:
+            logger.info(f"Observando '{inbox_dir}' por varredura a cada {poll_interval}s.")
+
+    def _scan(self):
+        present = set()
+        for entry in os.scandir(self.inbox_dir):
+            if entry.is_file() and fnmatch(entry.name, self.pattern):
+                present.add(entry.path)
+                if entry.path not in self._emitted:
+                    self._candidates.setdefault(entry.path, None)
+        # Arquivos entregues que saíram do diretório podem voltar com o mesmo nome
+        self._emitted &= present
+        self._last_scan = time.time()
+
+    def poll(self, timeout: float) -> List[str]:
+        """Espera até `timeout` segundos por novidades e devolve os arquivos prontos."""
+        if self._inotify is not None:
+            for event in self._inotify.read(timeout=int(timeout * 1000)):
+                if fnmatch(event.name, self.pattern):
+                    path = os.path.join(self.inbox_dir, event.name)
+                    # Nova gravação com o mesmo nome: é outro arquivo
+                    self._emitted.discard(path)
+                    self._candidates[path] = None
+            if time.time() - self._last_scan >= FULL_SCAN_INTERVAL:
+                self._scan()
+        else:
+            wait = self._last_scan + self.poll_interval - time.time()
+            if wait > 0:
+                time.sleep(min(wait, timeout))
+            if time.time() - self._last_scan >= self.poll_interval:
+                self._scan()
+        return self._ready()
+
+    def _ready(self) -> List[str]:
+        now = time.time()
+        ready = []
+        for path, state in list(self._candidates.items()):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                del self._candidates[path]
+                continue
+
+            signature = (st.st_size, st.st_mtime)
+            if state is None and now - st.st_mtime >= self.debounce and st.st_size > 0:
+                # Já estava parado havia tempo (ex.: arquivos presentes no início)
+                stable = True
+            elif state is None or state[0] != signature:
+                self._candidates[path] = (signature, now)
+                continue
+            else:
+                stable = now - state[1] >= self.debounce and st.st_size > 0
+
+            if stable:
+                del self._candidates[path]
+                self._emitted.add(path)
+                ready.append(path)
+        return sorted(ready)
+
+    @property
+    def pending(self) -> int:
+        """Arquivos vistos que ainda aguardam o fim da gravação."""
+        return len(self._candidates)
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -0,0 +1,131 @@
+# journal.py
+import logging
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger("JobJournal")
+
+# Etapas de um documento, na ordem em que acontecem
+STAGES = ('extracted', 'analyzed', 'parsed', 'persisted')
+# Estados finais fora do fluxo normal
+TERMINAL_STAGES = ('persisted', 'ignored')
+
+
+class JobJournal:
+    """
+    Diário local (SQLite, modo WAL) do andamento de cada documento, endereçado
+    pelo SHA-256 do PDF. Guarda a etapa alcançada e, depois da análise, o JSON
+    extraído, de modo que uma execução interrompida possa ser retomada sem
+    repetir a extração nem a chamada ao LLM.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Conexões SQLite não são compartilhadas entre threads (callbacks do Dask)
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                content_hash TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                pdf_path TEXT,
+                stage TEXT NOT NULL,
+                extracted_json TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_stage ON jobs (stage)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT * FROM jobs WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def record(self, content_hash: str, filename: str, stage: str,
+               pdf_path: Optional[str] = None, extracted_json: Optional[str] = None,
+               error: Optional[str] = None):
+        """
+        Registra a etapa do documento. Uma etapa nunca regride (um callback
+        atrasado de 'extracted' não desfaz um 'analyzed'), e o JSON extraído
+        já gravado é mantido se não vier um novo. A comparação de etapas é feita
+        no próprio upsert, então chamadas concorrentes (thread de callbacks do
+        Dask e laço principal) não se atropelam.
+        """
+        self._connection().execute(
+            f"""
+            INSERT INTO jobs (content_hash, filename, pdf_path, stage, extracted_json, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (content_hash) DO UPDATE SET
+                filename = excluded.filename,
+                pdf_path = COALESCE(excluded.pdf_path, jobs.pdf_path),
+                stage = excluded.stage,
+                extracted_json = COALESCE(excluded.extracted_json, jobs.extracted_json),
+                error = excluded.error,
+                updated_at = excluded.updated_at
+            WHERE {_STAGE_RANK_SQL.format(column='jobs.stage')} <= {_STAGE_RANK_SQL.format(column='excluded.stage')}
+            """,
+            (content_hash, filename, pdf_path, stage, extracted_json, error, time.time())
+        )
+
+    def mark_persisted(self, content_hash: str):
+        """Marca como gravado no banco o documento (na etapa 'parsed') com o hash dado."""
+        self._connection().execute(
+            "UPDATE jobs SET stage = 'persisted', error = NULL, updated_at = ? "
+            "WHERE content_hash = ? AND stage = 'parsed'",
+            (time.time(), content_hash)
+        )
+
+    def record_error(self, content_hash: str, filename: str, error: str,
+                     pdf_path: Optional[str] = None):
+        """Anota o erro sem mexer na etapa já alcançada ('failed' se for o primeiro registro)."""
+        self._connection().execute(
+            """
+            INSERT INTO jobs (content_hash, filename, pdf_path, stage, error, updated_at)
+            VALUES (?, ?, ?, 'failed', ?, ?)
+            ON CONFLICT (content_hash) DO UPDATE SET
+                error = excluded.error,
+                updated_at = excluded.updated_at
+            """,
+            (content_hash, filename, pdf_path, error, time.time())
+        )
+
+    def pending_after_analysis(self) -> List[dict]:
+        """Documentos já analisados pelo LLM mas ainda não gravados no banco."""
+        rows = self._connection().execute(
+            "SELECT * FROM jobs WHERE stage IN ('analyzed', 'parsed') "
+            "AND extracted_json IS NOT NULL ORDER BY updated_at"
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _stage_rank(stage: str) -> int:
+    if stage in TERMINAL_STAGES:
+        return len(STAGES)
+    return STAGES.index(stage) if stage in STAGES else -1
+
+
+# _stage_rank em SQL, para a condição do upsert em record()
+_STAGE_RANK_SQL = "(CASE {column} " + " ".join(
+    f"WHEN '{stage}' THEN {_stage_rank(stage)}" for stage in dict.fromkeys(STAGES + TERMINAL_STAGES)
+) + " ELSE -1 END)"
@@ -0,0 +1,121 @@
+# llm_cache.py
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger("LLMCache")
+
+
+class LLMResponseCache:
+    """
+    Cache persistente das respostas do LLM, em SQLite (modo WAL), compartilhado
+    por todos os processos de worker do nó através do mesmo arquivo.
+    A chave é o hash do prompt final + modelo + configuração de geração.
+    Entradas expiram após ttl_seconds; acima de max_bytes, as menos acessadas
+    recentemente são removidas.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # Conexões SQLite não são compartilhadas entre threads
+        self._local = threading.local()
+        self._puts_since_evict = 0
+        self._lock = threading.Lock()
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_access ON llm_responses (last_access)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(prompt: str, model: str, generation_config: dict) -> str:
+        payload = json.dumps(
+            {'prompt': prompt, 'model': model, 'generation_config': generation_config},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Retorna a resposta em cache, ou None se não existir ou estiver expirada."""
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        response, created_at = row
+        now = time.time()
+        if now - created_at > self.ttl_seconds:
+            conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            return None
+
+        conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+        return response
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO llm_responses (key, response, size, created_at, last_access)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (key, response, len(response.encode('utf-8')), now, now)
+        )
+
+        with self._lock:
+            self._puts_since_evict += 1
+            must_evict = self._puts_since_evict >= 100
+            if must_evict:
+                self._puts_since_evict = 0
+        if must_evict:
+            self.evict()
+
+    def evict(self):
+        """Remove entradas expiradas e, se preciso, as menos usadas até caber em max_bytes."""
+        conn = self._connection()
+        conn.execute(
+            "DELETE FROM llm_responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        )
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - int(self.max_bytes * 0.9)
+        removed = 0
+        keys = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM llm_responses ORDER BY last_access"
+        ).fetchall():
+            if removed >= excess:
+                break
+            keys.append((key,))
+            removed += size
+        conn.executemany("DELETE FROM llm_responses WHERE key = ?", keys)
+        logger.info(f"Cache LLM: {len(keys)} resposta(s) removida(s) (LRU).")
@@ -1,18 +1,21 @@
+import argparse
 import glob
 import os
 import json
+import signal
 import logging
 import shutil
-from tkinter import Tk, filedialog
+import threading
 
-import psycopg2  # Para executar o SQL automaticamente
-
-from dask.distributed import Client
-from setup_cluster import setup_master_scheduler
-from pdf_analyzer import extract_text_from_pdf
-from worker import process_document_with_ai
-from repo import ContractParser, generate_sql_script
+# tkinter, dask e psycopg2 são importados só nos caminhos que os usam
+# (diálogo de pasta, cluster, gravação), para o master subir rápido
+from worker import EXTRACT_RESOURCE, LLM_RESOURCE, extract_document, process_document_with_ai
+from repo import ContractParser, PrecosWriter, generate_sql_script
 from repo import Contrato
+from journal import JobJournal
+from inbox import InboxWatcher
+from text_cache import sha256_file
+import metrics
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,31 +23,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Número máximo de documentos em processamento simultâneo no cluster
+MAX_IN_FLIGHT = 24
 
-def execute_sql_script(sql_script: str):
-    """
-    Executa um script SQL que pode conter múltiplos statements.
-    Caso ele possua vários comandos separados por ';', o psycopg2
-    normalmente lida bem, mas se tiver problemas, podemos dividi-los manualmente.
-    """
-    # Ajuste aqui as credenciais do seu banco
-    conn = psycopg2.connect(
-        host="54.175.112.114",  # Ajuste para o host correto
-        port=5433,
-        database="compras_ia",
-        user="compras",
-        password="Sinerji"      # Ajuste para a senha correta
-    )
-    try:
-        with conn.cursor() as cur:
-            cur.execute(sql_script)
-        conn.commit()
-    finally:
-        conn.close()
+# Ajuste aqui as credenciais do seu banco (schema precos)
+DB_CONFIG = {
+    'host': "54.175.112.114",  # Ajuste para o host correto
+    'port': 5433,
+    'database': "compras_ia",
+    'user': "compras",
+    'password': "Sinerji"      # Ajuste para a senha correta
+}
+
+# Pool de conexões do gravador; pipeline_size > 1 envia vários contratos por ida ao banco
+DB_POOL = {
+    'minconn': 0,
+    'maxconn': 2,
+    'pipeline_size': 1
+}
+
+# Journal local (SQLite) com a etapa de cada documento, para retomar execuções
+JOURNAL_PATH = "job_journal.sqlite"
+
+# Modo contínuo: espera de estabilidade do arquivo e intervalo de varredura (segundos)
+INBOX_DEBOUNCE = 5.0
+INBOX_POLL_INTERVAL = 2.0
+
+# Métricas: endpoint Prometheus (None desliga) e trace JSONL com os spans de cada documento
+METRICS_PORT = 9108
+TRACE_PATH = os.path.join("results", "trace.jsonl")
+
+# Salvar também o script .sql de cada contrato (artefato de auditoria, opcional)
+WRITE_SQL_FILES = False
 
 
 def select_pdf_directory():
     """Função para abrir o explorador de arquivos e escolher a pasta de PDFs."""
+    from tkinter import Tk, filedialog
+
     root = Tk()
     root.withdraw()  # Esconde a janela principal
     folder_selected = filedialog.askdirectory(title="Selecione a pasta com os arquivos PDF")
@@ -84,145 +100,454 @@ def move_pdf_to_ignorados(pdf_path, dest_dir="PdfIgnorados"):
     return dest_path
 
 
-def process_pdfs_in_batches(pdf_paths, batch_size=3):
-    """Função para processar os PDFs em lotes (batch_size)."""
-    batches = [pdf_paths[i:i + batch_size] for i in range(0, len(pdf_paths), batch_size)]
-    return batches
+def file_size(pdf_path):
+    """Tamanho do arquivo em bytes (0 se não der para ler), usado na ordem de envio."""
+    try:
+        return os.path.getsize(pdf_path)
+    except OSError:
+        return 0
 
 
-def main():
-    logger.info("Iniciando Master Orchestrator...")
+def document_priority(pdf_path):
+    """Prioridade no scheduler: documentos maiores primeiro (maior valor = antes)."""
+    return file_size(pdf_path) // 1024
 
-    # 1. Subir o cluster local (master + scheduler)
-    cluster, client = setup_master_scheduler()
-    logger.info("Cluster (master + scheduler) iniciado com sucesso.")
 
-    # 2. Selecionar o diretório de PDFs com a GUI
-    pdf_dir = select_pdf_directory()
-    if not pdf_dir:
-        logger.warning("Nenhuma pasta foi selecionada. Encerrando.")
-        return
+def submit_document(client, pdf_path, content_hash=None, journal=None, priority=0):
+    """
+    Submete a extração e a análise de um PDF ao cluster. A extração é uma tarefa
+    própria e alimenta diretamente a tarefa de IA (sem passar pelo master).
+    Cada uma vai para o seu pool de workers (recursos EXTRACT e LLM, ver
+    setup_cluster), com a prioridade informada.
+    Com journal, o fim da extração é registrado assim que acontece.
+    Retorna o future do resultado final.
+    """
+    extraction_future = client.submit(extract_document, pdf_path, content_hash, pure=False,
+                                      resources={EXTRACT_RESOURCE: 1}, priority=priority)
+    if journal is not None:
+        def record_extracted(future):
+            try:
+                doc_data = future.result()
+            except Exception:
+                return
+            if doc_data.get('status') == 'extraido':
+                journal.record(doc_data['content_hash'], doc_data['filename'], 'extracted',
+                               pdf_path=doc_data['pdf_path'])
 
-    logger.info(f"Foram encontrados PDFs na pasta: {pdf_dir}")
-    pdf_paths = glob.glob(os.path.join(pdf_dir, "*.pdf"))
-    logger.info(f"Foram encontrados {len(pdf_paths)} arquivo(s) PDF em '{pdf_dir}'.")
+        extraction_future.add_done_callback(record_extracted)
+    return client.submit(process_document_with_ai, extraction_future, pure=False,
+                         resources={LLM_RESOURCE: 1}, priority=priority)
 
-    if not pdf_paths:
-        logger.warning(f"Nenhum PDF encontrado em '{pdf_dir}'. Encerrando.")
+
+def log_write_results(write_results, journal=None):
+    """
+    Registra o resultado das gravações no banco, por arquivo (e no journal, se houver).
+    As chaves de write_results são (filename, content_hash), passadas a writer.add.
+    """
+    for (filename, content_hash), ok in write_results.items():
+        if ok:
+            logger.info(f"Contrato de '{filename}' gravado com sucesso no banco!")
+            if journal is not None and content_hash is not None:
+                journal.mark_persisted(content_hash)
+        else:
+            logger.error(f"Erro ao gravar contrato de '{filename}' no banco.")
+
+
+def resume_from_journal(journal, writer):
+    """
+    Grava no banco os documentos que já passaram pelo LLM numa execução
+    anterior mas não chegaram a ser persistidos, usando o JSON guardado no journal.
+    """
+    pending = journal.pending_after_analysis()
+    if not pending:
         return
+    logger.info(f"Retomando {len(pending)} documento(s) já analisado(s) pelo LLM.")
+    for job in pending:
+        try:
+            contrato = ContractParser.parse(job['extracted_json'])
+            journal.record(job['content_hash'], job['filename'], 'parsed')
+            log_write_results(
+                writer.add(contrato, job['filename'], key=(job['filename'], job['content_hash'])),
+                journal
+            )
+        except Exception as e:
+            logger.error(f"Erro ao retomar '{job['filename']}': {e}")
+            journal.record_error(job['content_hash'], job['filename'], str(e))
+
+
+def skip_if_journaled(journal, pdf_path, content_hash):
+    """
+    Consulta o journal antes de submeter o PDF. Documentos já analisados ou
+    finalizados não voltam ao cluster (a gravação pendente é feita por
+    resume_from_journal); só o arquivo é movido para o destino correto.
+    Retorna True se o documento deve ser pulado.
+    """
+    job = journal.get(content_hash)
+    if job is None or job['stage'] in ('extracted', 'failed'):
+        return False
 
-    # 3. Processar PDFs em lotes de 3
-    doc_data_list = []
-    batches = process_pdfs_in_batches(pdf_paths)
+    logger.info(f"'{pdf_path}' já está no journal (etapa '{job['stage']}'); não será reprocessado.")
+    if job['stage'] == 'ignored':
+        move_pdf_to_ignorados(pdf_path)
+    else:
+        move_pdf_to_lidos(pdf_path)
+    return True
 
-    for batch in batches:
-        logger.info(f"Processando lote de {len(batch)} PDFs.")
-        
-        for i, pdf_path in enumerate(batch, start=1):
-            logger.info(f"Lendo [{i}/{len(batch)}]: '{pdf_path}'")
-            try:
-                # Extração do texto
-                text = extract_text_from_pdf(pdf_path)
 
-                # ======= [NOVA REGRA] Ignorar se conter "Contrato de Compra e Venda" =======
-                # Aqui, uso .lower() para deixar a checagem "case-insensitive".
-                if "contrato de compra e venda" in text.lower():
-                    logger.warning(f"O arquivo '{pdf_path}' contém 'Contrato de Compra e Venda'; será ignorado.")
-                    move_pdf_to_ignorados(pdf_path)
-                    continue  # Pula este PDF e vai para o próximo
+def handle_result(r, writer, journal=None, telemetry=None):
+    """
+    Trata o resultado de um documento assim que ele chega: move o PDF, salva JSON/SQL e grava no banco.
+    As etapas do master são cronometradas junto com os spans vindos dos workers
+    e entregues a telemetry (métricas + trace), se houver.
+    """
+    recorder = metrics.SpanRecorder(r.get('spans'))
+    try:
+        with recorder.activate():
+            _handle_result(r, writer, journal)
+    finally:
+        if telemetry is not None:
+            telemetry.document(r, recorder.spans)
 
-                # Se chegou aqui, significa que NÃO contém a frase proibida.
-                with open(pdf_path, "rb") as f:
-                    pdf_bytes = f.read()
 
-                logger.info(
-                    f"Extração concluída, texto com {len(text)} caracteres. "
-                    f"Tamanho do PDF em bytes: {len(pdf_bytes)}."
-                )
+def _handle_result(r, writer, journal=None):
+    pdf_path = r.get("pdf_path")
+    content_hash = r.get("content_hash")
+    journaled = journal is not None and content_hash is not None
 
-                # Move o PDF para a pasta 'PdfLidos' pois passou na checagem
-                moved_pdf_path = move_pdf_to_lidos(pdf_path)
+    # Mover o PDF conforme o resultado da extração
+    if r.get("status") == "ignorado":
+        if journaled:
+            journal.record(content_hash, r['filename'], 'ignored', pdf_path=pdf_path)
+        with metrics.span('file_move'):
+            move_pdf_to_ignorados(pdf_path)
+        return
+    if r.get("status") == "erro_extracao":
+        logger.error(f"Erro ao ler '{pdf_path}': {r.get('error')}")
+        if journaled:
+            journal.record_error(content_hash, r['filename'], r.get('error'), pdf_path=pdf_path)
+        with metrics.span('file_move'):
+            move_pdf_to_error(pdf_path)
+        return
 
+    logger.info(f"Resultado para {r['filename']}: {r}")
+
+    extracted_json = r.get("extracted_json")
+    if not extracted_json:
+        # Análise falhou: o PDF vai para a pasta de erros e pode ser reenviado depois
+        if journaled:
+            journal.record_error(content_hash, r['filename'], r.get('error'), pdf_path=pdf_path)
+        with metrics.span('file_move'):
+            move_pdf_to_error(pdf_path)
+    else:
+        # O JSON fica no journal antes de mover o PDF: um reinício não repete o LLM
+        if journaled:
+            journal.record(content_hash, r['filename'], 'analyzed',
+                           pdf_path=pdf_path, extracted_json=extracted_json)
+        with metrics.span('file_move'):
+            move_pdf_to_lidos(pdf_path)
+
+        logger.info(
+            f"\n===== JSON Extraído para {r['filename']} =====\n"
+            f"{extracted_json}\n"
+            "============================================\n"
+        )
+
+        # Salvar o JSON extraído em um arquivo
+        extracted_json_path = os.path.join("results", r['filename'] + "_extracted.json")
+        try:
+            with metrics.span('result_write', chars=len(extracted_json)):
+                with open(extracted_json_path, "w", encoding='utf-8') as f:
+                    f.write(extracted_json)
+            logger.info(f"JSON extraído salvo em: {extracted_json_path}")
+        except Exception as e:
+            logger.error(f"Falha ao salvar JSON extraído em '{extracted_json_path}': {e}")
+
+        with metrics.span('parse', chars=len(extracted_json)) as sp:
+            contrato = ContractParser.parse(extracted_json)
+            sp['items'] = len(contrato.itens)
+        if journaled:
+            journal.record(content_hash, r['filename'], 'parsed')
+
+        # Opcionalmente, gerar e salvar o script em arquivo .sql (auditoria)
+        if WRITE_SQL_FILES:
+            with metrics.span('sql_generation') as sp:
+                sql_script = generate_sql_script(contrato, r['filename'])
+                sp['chars'] = len(sql_script)
+            sql_script_path = os.path.join("results", r['filename'] + "_script.sql")
+            try:
+                with open(sql_script_path, "w", encoding='utf-8') as f:
+                    f.write(sql_script)
+                logger.info(f"Script SQL gerado e salvo em: {sql_script_path}")
             except Exception as e:
-                logger.error(f"Erro ao ler '{pdf_path}': {e}")
-                text = ""
-                pdf_bytes = b""
-                moved_pdf_path = move_pdf_to_error(pdf_path)  # Mover o PDF para a pasta de erros
-                continue  # Pula para o próximo PDF do batch
-
-            # Monta doc_data com binário, texto e o caminho do PDF movido
-            doc_data = {
-                "filename": os.path.basename(pdf_path),
-                "text": text,
-                "pdf_bytes": pdf_bytes,
-                "moved_pdf_path": moved_pdf_path
-            }
-            doc_data_list.append(doc_data)
-
-        # 4. Submetendo as tarefas ao cluster para os PDFs no lote
-        logger.info("Submetendo tarefas de processamento para o lote...")
-        futures = client.map(process_document_with_ai, doc_data_list)
-
-        # 5. Esperar os resultados dos workers
-        logger.info("Aguardando resultados dos workers...")
-        results = client.gather(futures)
-
-        # 6. Exibir / salvar o resultado do lote
-        for r in results:
-            logger.info(f"Resultado para {r['filename']}: {r}")
-
-            extracted_json = r.get("extracted_json")
-            if extracted_json:
-                logger.info(
-                    f"\n===== JSON Extraído para {r['filename']} =====\n"
-                    f"{extracted_json}\n"
-                    "============================================\n"
-                )
-
-                # Salvar o JSON extraído em um arquivo
-                extracted_json_path = os.path.join("results", r['filename'] + "_extracted.json")
-                try:
-                    with open(extracted_json_path, "w", encoding='utf-8') as f:
-                        f.write(extracted_json)
-                    logger.info(f"JSON extraído salvo em: {extracted_json_path}")
-                except Exception as e:
-                    logger.error(f"Falha ao salvar JSON extraído em '{extracted_json_path}': {e}")
+                logger.error(f"Falha ao salvar script SQL em '{sql_script_path}': {e}")
+
+        # Gravar no banco (statements preparados, conexão reutilizada do pool)
+        try:
+            with metrics.span('db_write', items=len(contrato.itens)) as sp:
+                write_results = writer.add(contrato, r['filename'], key=(r['filename'], content_hash))
+                # Com pipeline_size > 1, a ida ao banco acontece quando o grupo enche
+                sp['flushed'] = bool(write_results)
+            log_write_results(write_results, journal)
+        except Exception as e:
+            logger.error(f"Erro ao gravar contrato no banco: {e}")
+
+    # Salva o dicionário de "result" (status final) em um JSON local
+    local_res_path = os.path.join("results", r['filename'] + ".json")
+    try:
+        with metrics.span('result_write'):
+            with open(local_res_path, 'w', encoding='utf-8') as f:
+                json.dump(r, f, ensure_ascii=False, indent=2)
+        logger.info(f"Resultado salvo em: {local_res_path}")
+    except Exception as e:
+        logger.error(f"Falha ao salvar resultado em '{local_res_path}': {e}")
 
-                # Gerar o script SQL
-                contrato = ContractParser.parse(extracted_json)
-                sql_script = generate_sql_script(contrato, r['filename'])
-                
-                # Opcionalmente, salvar o script em arquivo .sql
-                sql_script_path = os.path.join("results", r['filename'] + "_script.sql")
-                try:
-                    with open(sql_script_path, "w", encoding='utf-8') as f:
-                        f.write(sql_script)
-                    logger.info(f"Script SQL gerado e salvo em: {sql_script_path}")
-                except Exception as e:
-                    logger.error(f"Falha ao salvar script SQL em '{sql_script_path}': {e}")
 
-                # Executar automaticamente o script no banco
+def submit_path(client, pdf_path, journal=None):
+    """
+    Submete um PDF ao cluster, consultando antes o journal (se houver).
+    Retorna o future, ou None se o documento já foi tratado numa execução anterior.
+    """
+    content_hash = None
+    if journal is not None:
+        try:
+            content_hash = sha256_file(pdf_path)
+            if skip_if_journaled(journal, pdf_path, content_hash):
+                return None
+        except Exception as e:
+            logger.error(f"Erro ao consultar o journal para '{pdf_path}': {e}")
+    return submit_document(client, pdf_path, content_hash, journal,
+                           priority=document_priority(pdf_path))
+
+
+def finish_future(future, pdf_path, writer, journal=None, telemetry=None):
+    """Trata o future concluído de um documento e o libera do cluster."""
+    try:
+        r = future.result()
+    except Exception as e:
+        logger.error(f"Falha na tarefa de '{pdf_path}': {e}")
+        move_pdf_to_error(pdf_path)
+        if telemetry is not None:
+            telemetry.document({'filename': os.path.basename(pdf_path), 'status': 'falha_tarefa'}, [])
+    else:
+        try:
+            handle_result(r, writer, journal, telemetry)
+        except Exception as e:
+            logger.error(f"Erro ao tratar o resultado de '{pdf_path}': {e}")
+    finally:
+        future.release()
+
+
+def run_streaming_pipeline(client, pdf_paths, writer, max_in_flight=MAX_IN_FLIGHT, journal=None,
+                           telemetry=None):
+    """
+    Processa os PDFs em fluxo contínuo: mantém até max_in_flight documentos no
+    cluster e, a cada resultado que chega (as_completed), trata o resultado e
+    submete o próximo PDF. Um documento lento não segura os demais.
+    Os PDFs entram do maior para o menor (longest processing time first): um
+    contrato enorme começa cedo em vez de ficar sozinho no fim da execução.
+    Com journal, PDFs já analisados em execuções anteriores não são resubmetidos.
+    """
+    from dask.distributed import as_completed
+
+    pending = iter(sorted(pdf_paths, key=file_size, reverse=True))
+    in_flight = as_completed()
+    future_paths = {}
+
+    def submit_next():
+        for pdf_path in pending:
+            future = submit_path(client, pdf_path, journal)
+            if future is None:
+                continue
+            future_paths[future] = pdf_path
+            in_flight.add(future)
+            return
+
+    for _ in range(max_in_flight):
+        submit_next()
+
+    for future in in_flight:
+        finish_future(future, future_paths.pop(future), writer, journal, telemetry)
+        # Libera o slot: o próximo documento entra imediatamente
+        submit_next()
+
+
+def run_inbox_daemon(client, inbox_dir, writer, journal=None, max_in_flight=MAX_IN_FLIGHT,
+                     debounce=INBOX_DEBOUNCE, poll_interval=INBOX_POLL_INTERVAL, stop_event=None,
+                     telemetry=None):
+    """
+    Modo contínuo: observa inbox_dir e envia cada PDF novo ao cluster assim que
+    termina de ser gravado, mantendo até max_in_flight documentos em andamento.
+    Quando stop_event é acionado (SIGTERM/SIGINT), para de aceitar arquivos,
+    espera os documentos em andamento e grava o que estiver pendente no banco.
+    """
+    from dask.distributed import as_completed
+
+    stop_event = stop_event or threading.Event()
+    watcher = InboxWatcher(inbox_dir, debounce=debounce, poll_interval=poll_interval)
+    queue = []
+    future_paths = {}
+
+    try:
+        while not stop_event.is_set():
+            # Espera curta quando há trabalho no cluster, para tratar resultados logo
+            timeout = 0.5 if future_paths else poll_interval
+            arrived = watcher.poll(timeout)
+            for pdf_path in arrived:
+                logger.info(f"Novo PDF na caixa de entrada: {pdf_path}")
+                queue.append(pdf_path)
+            if arrived:
+                # Com fila, os maiores saem primeiro (mesmo critério do modo pasta)
+                queue.sort(key=file_size, reverse=True)
+
+            for future in [f for f in future_paths if f.done()]:
+                finish_future(future, future_paths.pop(future), writer, journal, telemetry)
+
+            while queue and len(future_paths) < max_in_flight:
+                pdf_path = queue.pop(0)
+                future = submit_path(client, pdf_path, journal)
+                if future is not None:
+                    future_paths[future] = pdf_path
+
+            # Sem nada em andamento, grava no banco o que o writer estiver acumulando
+            if not future_paths and not queue:
                 try:
-                    execute_sql_script(sql_script)
-                    logger.info("Script SQL executado com sucesso no banco!")
+                    log_write_results(writer.flush(), journal)
                 except Exception as e:
-                    logger.error(f"Erro ao executar script SQL no banco: {e}")
+                    logger.error(f"Erro ao gravar contratos pendentes no banco: {e}")
 
-            # Salva o dicionário de "result" (status final) em um JSON local
-            local_res_path = os.path.join("results", r['filename'] + ".json")
-            try:
-                with open(local_res_path, 'w', encoding='utf-8') as f:
-                    json.dump(r, f, ensure_ascii=False, indent=2)
-                logger.info(f"Resultado salvo em: {local_res_path}")
-            except Exception as e:
-                logger.error(f"Falha ao salvar resultado em '{local_res_path}': {e}")
+        logger.info(f"Encerrando: aguardando {len(future_paths)} documento(s) em andamento...")
+        for future in as_completed(list(future_paths)):
+            finish_future(future, future_paths.pop(future), writer, journal, telemetry)
+        if queue:
+            logger.info(f"{len(queue)} PDF(s) não iniciados ficam na caixa de entrada.")
+    finally:
+        watcher.close()
 
-    # 7. Encerrar cluster
+
+def start_telemetry():
+    """Métricas Prometheus (METRICS_PORT) e trace JSONL (TRACE_PATH) do master."""
+    registry = metrics.MetricsRegistry()
+    if METRICS_PORT:
+        try:
+            metrics.start_metrics_server(registry, METRICS_PORT)
+        except OSError as e:
+            logger.warning(f"Não foi possível abrir o endpoint de métricas na porta {METRICS_PORT}: {e}")
+    return metrics.Telemetry(registry, metrics.TraceWriter(TRACE_PATH))
+
+
+def _db_pool_config(batch_size=None):
+    """DB_POOL com o tamanho de lote (contratos por ida ao banco) da linha de comando, se houver."""
+    if batch_size:
+        return dict(DB_POOL, pipeline_size=batch_size)
+    return DB_POOL
+
+
+def main_daemon(inbox_dir, max_in_flight=MAX_IN_FLIGHT, batch_size=None):
+    """Modo contínuo (sem GUI): processa os PDFs que chegam em inbox_dir até receber SIGTERM."""
+    from setup_cluster import setup_master_scheduler
+    logger.info(f"Iniciando Master Orchestrator em modo contínuo (caixa de entrada: {inbox_dir})...")
+
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info(f"Sinal {signum} recebido; drenando documentos em andamento.")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    cluster, client = setup_master_scheduler()
+    logger.info("Cluster (master + scheduler) iniciado com sucesso.")
+
+    journal = JobJournal(JOURNAL_PATH)
+    telemetry = start_telemetry()
+    writer = PrecosWriter(**_db_pool_config(batch_size), **DB_CONFIG)
+    try:
+        resume_from_journal(journal, writer)
+        run_inbox_daemon(client, inbox_dir, writer, journal,
+                         max_in_flight=max_in_flight, stop_event=stop_event,
+                         telemetry=telemetry)
+    finally:
+        try:
+            log_write_results(writer.flush(), journal)
+        except Exception as e:
+            logger.error(f"Erro ao gravar contratos pendentes no banco: {e}")
+        writer.close()
+        journal.close()
+        telemetry.close()
+        client.close()
+        cluster.close()
+    logger.info("Master Orchestrator finalizado.")
+
+
+def main(pdf_dir=None, max_in_flight=MAX_IN_FLIGHT, batch_size=None):
+    """
+    Execução única sobre uma pasta de PDFs. Sem pdf_dir, a pasta é escolhida
+    na janela do Tk; com pdf_dir (linha de comando), roda sem interface gráfica.
+    """
+    from setup_cluster import setup_master_scheduler
+
+    logger.info("Iniciando Master Orchestrator...")
+
+    # 1. Selecionar o diretório de PDFs (antes de subir o cluster)
+    if not pdf_dir:
+        pdf_dir = select_pdf_directory()
+    if not pdf_dir:
+        logger.warning("Nenhuma pasta foi selecionada. Encerrando.")
+        return
+
+    logger.info(f"Foram encontrados PDFs na pasta: {pdf_dir}")
+    pdf_paths = glob.glob(os.path.join(pdf_dir, "*.pdf"))
+    logger.info(f"Foram encontrados {len(pdf_paths)} arquivo(s) PDF em '{pdf_dir}'.")
+
+    if not pdf_paths:
+        logger.warning(f"Nenhum PDF encontrado em '{pdf_dir}'. Encerrando.")
+        return
+
+    # 2. Subir o cluster local (master + scheduler)
+    cluster, client = setup_master_scheduler()
+    logger.info("Cluster (master + scheduler) iniciado com sucesso.")
+
+    # 3. Processar PDFs em fluxo, com até max_in_flight documentos no cluster.
+    #    O journal permite retomar uma execução interrompida sem repetir etapas.
+    journal = JobJournal(JOURNAL_PATH)
+    telemetry = start_telemetry()
+    writer = PrecosWriter(**_db_pool_config(batch_size), **DB_CONFIG)
+    try:
+        resume_from_journal(journal, writer)
+        run_streaming_pipeline(client, pdf_paths, writer, max_in_flight=max_in_flight,
+                               journal=journal, telemetry=telemetry)
+    finally:
+        try:
+            log_write_results(writer.flush(), journal)
+        except Exception as e:
+            logger.error(f"Erro ao gravar contratos pendentes no banco: {e}")
+        writer.close()
+        journal.close()
+        telemetry.close()
+
+    # 4. Encerrar cluster
     logger.info("Encerrando client e cluster.")
     client.close()
     cluster.close()
     logger.info("Master Orchestrator finalizado.")
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Master Orchestrator do extrator de contratos")
+    parser.add_argument("pasta", nargs="?",
+                        help="Pasta com os PDFs (sem ela, abre a janela de seleção)")
+    parser.add_argument("--inbox", help="Modo contínuo: observa este diretório (sem GUI)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"Contratos por ida ao banco (padrão: {DB_POOL['pipeline_size']})")
+    parser.add_argument("--concurrency", type=int, default=MAX_IN_FLIGHT,
+                        help=f"Documentos em processamento simultâneo no cluster (padrão: {MAX_IN_FLIGHT})")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.inbox:
+        main_daemon(args.inbox, max_in_flight=args.concurrency, batch_size=args.batch_size)
+    else:
+        main(args.pasta, max_in_flight=args.concurrency, batch_size=args.batch_size)
@@ -0,0 +1,239 @@
+# metrics.py
+import bisect
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("Metrics")
+
+# Limites (segundos) dos buckets do histograma de duração das etapas
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_local = threading.local()
+
+
+class SpanRecorder:
+    """
+    Coleta os spans (etapas cronometradas) de um documento. Cada span é um dict
+    simples, serializável, com nome, início, duração e atributos (tamanhos,
+    contagens, cache hit/miss...), para voltar dos workers ao master junto
+    com o resultado da tarefa. Pode ser ativado em várias threads ao mesmo
+    tempo (ex.: trechos de um documento analisados em paralelo).
+    """
+
+    def __init__(self, spans: Optional[List[dict]] = None):
+        self.spans = list(spans or [])
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attrs):
+        record = {'name': name, 'start': time.time(), 'pid': os.getpid()}
+        record.update(attrs)
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['seconds'] = round(time.perf_counter() - started, 6)
+            with self._lock:
+                self.spans.append(record)
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Torna este o coletor da thread atual (usado por span() do módulo)."""
+        previous = getattr(_local, 'recorder', None)
+        _local.recorder = self
+        try:
+            yield self
+        finally:
+            _local.recorder = previous
+
+
+def current_recorder() -> Optional[SpanRecorder]:
+    """Coletor ativo da thread atual, para ativá-lo também em threads auxiliares."""
+    return getattr(_local, 'recorder', None)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs):
+    """
+    Span no coletor ativo da thread. Sem coletor ativo (ex.: código fora de
+    uma tarefa de documento), só devolve um dict descartável: quem chama não
+    precisa saber.
+    """
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is None:
+        yield dict(attrs)
+        return
+    with recorder.span(name, **attrs) as record:
+        yield record
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(DURATION_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(DURATION_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Agrega no master os spans recebidos dos workers e exporta no formato de
+    texto do Prometheus: duração por etapa (histograma), contagem por etapa e
+    resultado, documentos por status, cache hit/miss e caracteres/tokens.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations: Dict[str, _Histogram] = {}
+        self._stage_total: Dict[tuple, int] = {}
+        self._documents: Dict[str, int] = {}
+        self._cache: Dict[tuple, int] = {}
+        self._chars: Dict[str, int] = {}
+        self._tokens: Dict[str, int] = {}
+
+    def observe_document(self, status: str, spans: List[dict]):
+        with self._lock:
+            self._documents[status] = self._documents.get(status, 0) + 1
+            for s in spans:
+                name = s['name']
+                self._durations.setdefault(name, _Histogram()).observe(s.get('seconds', 0.0))
+                outcome = 'error' if s.get('error') else 'ok'
+                self._stage_total[(name, outcome)] = self._stage_total.get((name, outcome), 0) + 1
+                if s.get('cache') in ('hit', 'miss'):
+                    key = (name, s['cache'])
+                    self._cache[key] = self._cache.get(key, 0) + 1
+                if isinstance(s.get('chars'), int):
+                    self._chars[name] = self._chars.get(name, 0) + s['chars']
+                if isinstance(s.get('tokens'), int):
+                    self._tokens[name] = self._tokens.get(name, 0) + s['tokens']
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines.append("# HELP pipeline_stage_seconds Duração das etapas do pipeline.")
+            lines.append("# TYPE pipeline_stage_seconds histogram")
+            for name, h in sorted(self._durations.items()):
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS, h.counts):
+                    cumulative += count
+                    lines.append(f'pipeline_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'pipeline_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'pipeline_stage_seconds_sum{{stage="{name}"}} {h.total:.6f}')
+                lines.append(f'pipeline_stage_seconds_count{{stage="{name}"}} {h.count}')
+
+            lines.append("# HELP pipeline_stage_total Execuções das etapas por resultado.")
+            lines.append("# TYPE pipeline_stage_total counter")
+            for (name, outcome), value in sorted(self._stage_total.items()):
+                lines.append(f'pipeline_stage_total{{stage="{name}",outcome="{outcome}"}} {value}')
+
+            lines.append("# HELP pipeline_documents_total Documentos tratados pelo master, por status.")
+            lines.append("# TYPE pipeline_documents_total counter")
+            for status, value in sorted(self._documents.items()):
+                lines.append(f'pipeline_documents_total{{status="{status}"}} {value}')
+
+            lines.append("# HELP pipeline_cache_total Consultas a cache por etapa e resultado.")
+            lines.append("# TYPE pipeline_cache_total counter")
+            for (name, result), value in sorted(self._cache.items()):
+                lines.append(f'pipeline_cache_total{{stage="{name}",result="{result}"}} {value}')
+
+            lines.append("# HELP pipeline_chars_total Caracteres processados por etapa.")
+            lines.append("# TYPE pipeline_chars_total counter")
+            for name, value in sorted(self._chars.items()):
+                lines.append(f'pipeline_chars_total{{stage="{name}"}} {value}')
+
+            lines.append("# HELP pipeline_tokens_total Tokens estimados enviados por etapa.")
+            lines.append("# TYPE pipeline_tokens_total counter")
+            for name, value in sorted(self._tokens.items()):
+                lines.append(f'pipeline_tokens_total{{stage="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class TraceWriter:
+    """Grava um registro JSON por documento (com todos os spans) em um arquivo JSONL."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Telemetry:
+    """
+    Destino, no master, dos spans de cada documento: agregação em um
+    MetricsRegistry e um registro por documento no trace JSONL (ambos opcionais).
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None,
+                 trace: Optional[TraceWriter] = None):
+        self.registry = registry
+        self.trace = trace
+
+    def document(self, r: dict, spans: List[dict]):
+        status = r.get('status')
+        if status == 'extraido':
+            status = 'sucesso' if r.get('success') else 'falha_analise'
+        if self.registry is not None:
+            self.registry.observe_document(status or 'desconhecido', spans)
+        if self.trace is not None:
+            self.trace.write({
+                'filename': r.get('filename'),
+                'content_hash': r.get('content_hash'),
+                'status': status,
+                'processing_time': r.get('processing_time'),
+                'spans': spans,
+            })
+
+    def close(self):
+        if self.trace is not None:
+            self.trace.close()
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int, host: str = "0.0.0.0"):
+    """Expõe registry.render() em http://host:port/metrics (thread daemon). Retorna o servidor."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            data = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            logger.debug(fmt % args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Métricas Prometheus em http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,263 @@
+# mock_gemini.py
+"""
+Servidor local que imita o endpoint generateContent da API Gemini, para testes
+de carga e de timeout sem gastar cota. Usado pelo GeminiClient quando
+CONFIG['gemini']['backend'] == 'mock' (ver CONFIG['gemini']['mock']).
+
+Cada requisição sorteia (com semente fixa, então a sequência é reproduzível):
+ - travamento (stall_rate): segura a resposta por stall_seconds;
+ - erro 429 (rate_429) ou 500 (rate_500);
+ - latência: mediana * lognormal(sigma) + per_1k_chars por mil caracteres do prompt;
+ - resposta malformada: JSON truncado (malformed_rate, irrecuperável) ou
+   JSON cercado de texto (wrapped_rate, recuperável pelo reparo do worker).
+A resposta é o JSON de --canned, ou um contrato montado a partir do texto do
+prompt (número do contrato, CNPJs, valores em R$); em prompts em lote, um
+contrato por documento, sob a chave de cada um.
+
+Uso: python mock_gemini.py --port 8089 --latency-median 1.5 --rate-429 0.02 --stall-rate 0.01
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("MockGemini")
+
+CONTRACT_RE = re.compile(r'contrato\s+n[º°o.]*\s*([\w./-]+)', re.IGNORECASE)
+CNPJ_RE = re.compile(r'\b\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}\b')
+MONEY_RE = re.compile(r'R\$\s*\d{1,3}(?:\.?\d{3})*(?:,\d{2})?')
+TEXT_MARKER = "Texto para análise:*"
+# Delimitador dos documentos de um prompt em lote (ver batching.py)
+DOC_MARKER_RE = re.compile(r'^=== (DOC_\d+) ===$', re.MULTILINE)
+
+
+class MockSettings:
+    """Parâmetros de comportamento do servidor (mesmos nomes das opções da linha de comando)."""
+
+    def __init__(self, latency_median=1.0, latency_sigma=0.5, per_1k_chars=0.0,
+                 rate_429=0.0, rate_500=0.0, malformed_rate=0.0, wrapped_rate=0.0,
+                 stall_rate=0.0, stall_seconds=600.0, canned=None, seed=0):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.per_1k_chars = per_1k_chars
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.malformed_rate = malformed_rate
+        self.wrapped_rate = wrapped_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.canned = canned
+        self.seed = seed
+
+
+def template_response(prompt: str) -> str:
+    """Contrato no formato do prompt, com os dados que dá para achar no texto."""
+    text = prompt.split(TEXT_MARKER, 1)[-1]
+    parts = DOC_MARKER_RE.split(text)
+    if len(parts) > 1:
+        # parts = [aviso, id1, texto1, id2, texto2, ...]
+        batch = {doc_id: json.loads(_contract_from_text(body))
+                 for doc_id, body in zip(parts[1::2], parts[2::2])}
+        return json.dumps(batch, ensure_ascii=False, indent=2)
+    return _contract_from_text(text)
+
+
+def _contract_from_text(text: str) -> str:
+    number = CONTRACT_RE.search(text)
+    cnpjs = CNPJ_RE.findall(text)
+    values = MONEY_RE.findall(text)
+    itens = []
+    for i in range(0, len(values) - 1, 2):
+        itens.append({
+            "descricao": f"Item {i // 2 + 1}",
+            "especificacao": None,
+            "unidade_medida": "UN",
+            "quantidade": "1",
+            "valor_unitario": values[i],
+            "valor_total": values[i + 1],
+            "catmat_catser": None,
+            "tipo": "Material",
+            "locais_execucao_entrega": None,
+        })
+    return json.dumps({
+        "numero_contrato": number.group(1) if number else None,
+        "tipo_instrumento": "Contrato",
+        "processo_administrativo": None,
+        "data_celebracao": None,
+        "fonte_preco": "Contrato",
+        "referencia_contrato": number.group(1) if number else None,
+        "anexo_contrato": None,
+        "status_extracao": "Parcial",
+        "orgao_contratante": {"razao_social": None, "sigla": None,
+                              "cnpj": cnpjs[0] if cnpjs else None},
+        "empresa_contratada": {"razao_social": None,
+                               "cnpj": cnpjs[1] if len(cnpjs) > 1 else None},
+        "itens": itens,
+    }, ensure_ascii=False, indent=2)
+
+
+class MockGemini:
+    """Decide o desfecho de cada requisição e mantém contadores."""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self._rng = random.Random(settings.seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "429": 0, "500": 0,
+                      "malformed": 0, "wrapped": 0, "stalled": 0}
+        self._canned = None
+        if settings.canned:
+            with open(settings.canned, encoding="utf-8") as f:
+                self._canned = f.read()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def plan(self, prompt_chars: int) -> dict:
+        """Sorteia o desfecho da requisição (sob lock: sequência reproduzível)."""
+        s = self.settings
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self._rng.random()
+            gauss = self._rng.gauss(0.0, 1.0)
+            shape = self._rng.random()
+        outcome = "ok"
+        for name, rate in (("stalled", s.stall_rate), ("429", s.rate_429), ("500", s.rate_500)):
+            if roll < rate:
+                outcome = name
+                break
+            roll -= rate
+        if outcome == "ok":
+            if shape < s.malformed_rate:
+                outcome = "malformed"
+            elif shape < s.malformed_rate + s.wrapped_rate:
+                outcome = "wrapped"
+        latency = s.latency_median * math.exp(s.latency_sigma * gauss) + s.per_1k_chars * prompt_chars / 1000
+        return {"outcome": outcome, "latency": latency}
+
+    def respond(self, prompt: str):
+        """Retorna (status HTTP, corpo) depois de aplicar latência/travamento."""
+        plan = self.plan(len(prompt))
+        outcome = plan["outcome"]
+        self._count(outcome)
+
+        if outcome == "stalled":
+            time.sleep(self.settings.stall_seconds)
+        else:
+            time.sleep(plan["latency"])
+
+        if outcome == "429":
+            return 429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                   "message": "Quota exceeded (mock)."}}
+        if outcome == "500":
+            return 500, {"error": {"code": 500, "status": "INTERNAL",
+                                   "message": "Internal error (mock)."}}
+
+        text = self._canned if self._canned is not None else template_response(prompt)
+        if outcome == "malformed":
+            text = text[:max(1, len(text) // 2)]
+        elif outcome == "wrapped":
+            text = f"Segue o JSON solicitado:\n```json\n{text}\n```\nQualquer dúvida, estou à disposição."
+        return 200, {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                     "finishReason": "STOP"}]}
+
+
+def make_handler(mock: MockGemini):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                # O cliente desistiu (timeout) antes da resposta
+                pass
+
+        def do_POST(self):
+            if not self.path.endswith(":generateContent"):
+                self._send(404, {"error": {"code": 404, "message": "not found"}})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+                prompt = "".join(
+                    part.get("text", "")
+                    for content in body.get("contents", [])
+                    for part in content.get("parts", [])
+                )
+            except (ValueError, AttributeError):
+                self._send(400, {"error": {"code": 400, "message": "invalid body"}})
+                return
+            self._send(*mock.respond(prompt))
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with mock._lock:
+                    self._send(200, dict(mock.stats))
+            else:
+                self._send(404, {"error": {"code": 404, "message": "not found"}})
+
+        def log_message(self, fmt, *args):
+            logger.debug(fmt % args)
+
+    return Handler
+
+
+def start_mock_server(settings: MockSettings, host: str = "127.0.0.1", port: int = 8089):
+    """Sobe o servidor em thread própria. Retorna (servidor, thread); use server.shutdown() para parar."""
+    server = ThreadingHTTPServer((host, port), make_handler(MockGemini(settings)))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="mock-gemini", daemon=True)
+    thread.start()
+    logger.info(f"Mock Gemini ouvindo em http://{host}:{server.server_address[1]}")
+    return server, thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API Gemini")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-median", type=float, default=1.0, help="segundos")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="dispersão lognormal")
+    parser.add_argument("--per-1k-chars", type=float, default=0.0, help="segundos extras por mil caracteres")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-500", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--wrapped-rate", type=float, default=0.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=600.0)
+    parser.add_argument("--canned", help="arquivo JSON devolvido em vez do contrato gerado do prompt")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    settings = MockSettings(
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma,
+        per_1k_chars=args.per_1k_chars, rate_429=args.rate_429, rate_500=args.rate_500,
+        malformed_rate=args.malformed_rate, wrapped_rate=args.wrapped_rate,
+        stall_rate=args.stall_rate, stall_seconds=args.stall_seconds,
+        canned=args.canned, seed=args.seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(MockGemini(settings)))
+    server.daemon_threads = True
+    logger.info(f"Mock Gemini ouvindo em http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,84 @@
 # pdf_analyzer.py
-import PyPDF2
 import os
+import re
+from typing import Iterator, Optional, Tuple
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+from text_cache import get_default_cache, sha256_file
+
+def iter_pdf_pages(pdf_path: str) -> Iterator[str]:
     """
-    Extrai o texto de um arquivo PDF usando PyPDF2.
-    Retorna a string com o texto.
+    Gera o texto do PDF página a página (lazy), usando PyPDF2.
+    Páginas sem texto extraível são omitidas.
     """
     if not os.path.isfile(pdf_path):
         raise FileNotFoundError(f"Arquivo não encontrado: {pdf_path}")
-    
-    text = []
+
+    # Importado aqui: só quem de fato lê PDFs paga o custo do PyPDF2
+    import PyPDF2
+
     with open(pdf_path, 'rb') as file:
         reader = PyPDF2.PdfReader(file)
         for page in reader.pages:
             page_text = page.extract_text()
             if page_text:
-                text.append(page_text)
+                yield page_text
+
+def extract_text_from_pdf(pdf_path: str, use_cache: bool = True,
+                          content_hash: Optional[str] = None) -> str:
+    """
+    Extrai o texto de um arquivo PDF usando PyPDF2.
+    Retorna a string com o texto.
+    Com use_cache, consulta antes o cache de texto (chave = SHA-256 do PDF)
+    e grava nele o resultado da extração.
+    """
+    if not use_cache:
+        return "\n".join(iter_pdf_pages(pdf_path))
+
+    if not os.path.isfile(pdf_path):
+        raise FileNotFoundError(f"Arquivo não encontrado: {pdf_path}")
+
+    cache = get_default_cache()
+    content_hash = content_hash or sha256_file(pdf_path)
+    text = cache.get(content_hash)
+    if text is None:
+        text = "\n".join(iter_pdf_pages(pdf_path))
+        cache.put(content_hash, text)
+    return text
+
+def extract_text_unless(pdf_path: str, phrase: str, use_cache: bool = True,
+                        content_hash: Optional[str] = None,
+                        meta: Optional[dict] = None) -> Tuple[Optional[str], bool]:
+    """
+    Extrai o texto do PDF, parando na primeira página que contenha `phrase`
+    (comparação case-insensitive, feita página a página).
+    Retorna (texto, False) se a frase não aparece, ou (None, True) se aparece;
+    neste caso o restante do documento não chega a ser lido.
+    Com use_cache, um texto já em cache é verificado sem reler o PDF.
+    Se informado, `meta` recebe meta['text_cache'] = 'hit' ou 'miss'.
+    """
+    if meta is None:
+        meta = {}
+    cache = None
+    if use_cache:
+        if not os.path.isfile(pdf_path):
+            raise FileNotFoundError(f"Arquivo não encontrado: {pdf_path}")
+        cache = get_default_cache()
+        content_hash = content_hash or sha256_file(pdf_path)
+        cached_text = cache.get(content_hash)
+        meta['text_cache'] = 'miss' if cached_text is None else 'hit'
+        if cached_text is not None:
+            if re.search(re.escape(phrase), cached_text, re.IGNORECASE):
+                return None, True
+            return cached_text, False
+
+    phrase = phrase.lower()
+    text = []
+    for page_text in iter_pdf_pages(pdf_path):
+        if phrase in page_text.lower():
+            return None, True
+        text.append(page_text)
 
-    return "\n".join(text)
+    full_text = "\n".join(text)
+    if cache is not None:
+        cache.put(content_hash, full_text)
+    return full_text, False
@@ -1,10 +1,25 @@
+import io
 import json
 import logging
+import math
+import os
+import re
+import sys
+from array import array
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional
+from fnmatch import fnmatch
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-# Caso use psycopg2, o import deve estar aqui ou no chamador
-import psycopg2
+# Decodificador JSON mais rápido, se instalado
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# psycopg2 é importado nos métodos que falam com o banco: quem só converte
+# JSON (ContractParser, workers) não paga o custo de carregá-lo
 
 # Configuração básica de logging
 logging.basicConfig(
@@ -17,6 +32,8 @@ logging.basicConfig(
 # =========================================
 
 class OrgaoContratante:
+    __slots__ = ("razao_social", "sigla", "cnpj")
+
     def __init__(self, razao_social: str, sigla: Optional[str], cnpj: str):
         self.razao_social = razao_social
         self.sigla = sigla
@@ -24,12 +41,18 @@ class OrgaoContratante:
 
 
 class EmpresaContratada:
+    __slots__ = ("razao_social", "cnpj")
+
     def __init__(self, razao_social: str, cnpj: str):
         self.razao_social = razao_social
         self.cnpj = cnpj
 
 
 class Item:
+    __slots__ = ("descricao", "especificacao", "unidade_medida", "quantidade",
+                 "valor_unitario", "valor_total", "catmat_catser", "tipo",
+                 "locais_execucao_entrega")
+
     def __init__(self,
                  descricao: str,
                  especificacao: Optional[str],
@@ -52,6 +75,11 @@ class Item:
 
 
 class Contrato:
+    __slots__ = ("numero_contrato", "tipo_instrumento", "processo_administrativo",
+                 "data_celebracao", "fonte_preco", "referencia_contrato",
+                 "anexo_contrato", "status_extracao", "orgao_contratante",
+                 "empresa_contratada", "itens")
+
     def __init__(self,
                  numero_contrato: str,
                  tipo_instrumento: str,
@@ -77,6 +105,120 @@ class Contrato:
         self.itens = itens
 
 
+_NUMBER_CLEAN_RE = re.compile(r'[^\d,.\-]')
+
+
+def parse_decimal_br(value) -> Optional[float]:
+    """
+    Converte valores como "R$ 1.234,56", "1234,5", "1.000" ou "10" em float.
+    Sem vírgula, um ponto seguido de exatamente 3 dígitos é separador de
+    milhar ("1.000" = 1000), exceto após zero ("0.500" = 0.5).
+    Retorna None para vazios, placeholders e textos não numéricos.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = _NUMBER_CLEAN_RE.sub('', str(value))
+    if not cleaned:
+        return None
+    if ',' in cleaned:
+        # Formato brasileiro: ponto como milhar, vírgula como decimal
+        cleaned = cleaned.replace('.', '').replace(',', '.')
+    elif cleaned.count('.') > 1:
+        cleaned = cleaned.replace('.', '')
+    elif '.' in cleaned:
+        inteiro, fracao = cleaned.split('.')
+        if len(fracao) == 3 and inteiro.lstrip('-') not in ('', '0'):
+            cleaned = inteiro + fracao
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ItemBatch:
+    """
+    Itens de muitos contratos em colunas, em vez de um objeto Item por item:
+    quantidades e valores em array('d') (NaN quando ausentes), unidade e tipo
+    como strings internadas (poucos valores distintos) e os textos livres em listas.
+    contrato_idx aponta, para cada item, a posição do contrato em `contratos`.
+    """
+
+    __slots__ = ("contratos", "contrato_idx", "descricao", "especificacao",
+                 "unidade_medida", "quantidade", "valor_unitario", "valor_total",
+                 "catmat_catser", "tipo", "locais_execucao_entrega")
+
+    def __init__(self):
+        self.contratos: List[str] = []
+        self.contrato_idx = array('l')
+        self.descricao: List[str] = []
+        self.especificacao: List[Optional[str]] = []
+        self.unidade_medida: List[Optional[str]] = []
+        self.quantidade = array('d')
+        self.valor_unitario = array('d')
+        self.valor_total = array('d')
+        self.catmat_catser: List[Optional[str]] = []
+        self.tipo: List[str] = []
+        self.locais_execucao_entrega: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.descricao)
+
+    def add_contract(self, numero_contrato: str) -> int:
+        """Registra um contrato e retorna seu índice para os itens seguintes."""
+        self.contratos.append(_intern(numero_contrato or ""))
+        return len(self.contratos) - 1
+
+    def append(self, contrato_idx: int, descricao: str, especificacao: Optional[str],
+               unidade_medida: Optional[str], quantidade, valor_unitario, valor_total,
+               catmat_catser: Optional[str], tipo: str,
+               locais_execucao_entrega: Optional[str]):
+        def num(value):
+            parsed = parse_decimal_br(value)
+            return math.nan if parsed is None else parsed
+
+        self.contrato_idx.append(contrato_idx)
+        self.descricao.append(descricao)
+        self.especificacao.append(especificacao)
+        self.unidade_medida.append(_intern(unidade_medida))
+        self.quantidade.append(num(quantidade))
+        self.valor_unitario.append(num(valor_unitario))
+        self.valor_total.append(num(valor_total))
+        self.catmat_catser.append(catmat_catser)
+        self.tipo.append(_intern(tipo))
+        self.locais_execucao_entrega.append(locais_execucao_entrega)
+
+    def add_items(self, contrato: "Contrato"):
+        """Copia os itens de um Contrato já montado para o lote."""
+        idx = self.add_contract(contrato.numero_contrato)
+        for item in contrato.itens:
+            self.append(idx, item.descricao, item.especificacao, item.unidade_medida,
+                        item.quantidade, item.valor_unitario, item.valor_total,
+                        item.catmat_catser, item.tipo, item.locais_execucao_entrega)
+
+    def item(self, i: int) -> "Item":
+        """Reconstrói o Item da posição i (números voltam como texto, None se ausentes)."""
+        def txt(value):
+            return None if math.isnan(value) else repr(value)
+
+        return Item(
+            descricao=self.descricao[i],
+            especificacao=self.especificacao[i],
+            unidade_medida=self.unidade_medida[i],
+            quantidade=txt(self.quantidade[i]),
+            valor_unitario=txt(self.valor_unitario[i]),
+            valor_total=txt(self.valor_total[i]),
+            catmat_catser=self.catmat_catser[i],
+            tipo=self.tipo[i],
+            locais_execucao_entrega=self.locais_execucao_entrega[i]
+        )
+
+
 # =========================================
 # ============= PARSER CLASS =============
 # =========================================
@@ -85,10 +227,20 @@ class ContractParser:
     """
     Responsável por converter JSON em objetos de domínio.
     """
+    logger = logging.getLogger("ContractParser")
+
     @staticmethod
-    def parse(json_str: str) -> Contrato:
-        data = json.loads(json_str)
+    def parse(json_str: Union[str, bytes]) -> Contrato:
+        return ContractParser.parse_dict(_json_loads(json_str))
 
+    @staticmethod
+    def parse_file(path: str) -> Contrato:
+        """Lê e converte um arquivo JSON (em bytes, sem decodificar antes)."""
+        with open(path, "rb") as f:
+            return ContractParser.parse(f.read())
+
+    @staticmethod
+    def parse_dict(data: dict) -> Contrato:
         # Garantir que "orgao_contratante" exista, se não, será um dicionário vazio
         oc_data = data.get("orgao_contratante") or {}
         orgao_contratante = OrgaoContratante(
@@ -135,10 +287,127 @@ class ContractParser:
         )
         return contrato
 
+    @staticmethod
+    def parse_many(source: Union[str, bytes, Iterable], pattern: str = "*.json",
+                   workers: int = 0, chunksize: int = 32,
+                   skip_errors: bool = False) -> Iterator[Contrato]:
+        """
+        Converte vários contratos, devolvendo-os um a um (lazy). `source` pode ser:
+         - caminho de diretório: arquivos que casam com `pattern` (ex.: "*_extracted.json");
+         - caminho de arquivo .jsonl (um contrato por linha) ou de um .json;
+         - bytes com um JSON (objeto ou lista) ou um JSONL;
+         - arquivo aberto / iterável de linhas JSONL, ou lista de caminhos.
+        Com workers > 1, arquivos são convertidos em um pool de processos.
+        Com skip_errors, entradas inválidas são registradas no log e ignoradas.
+        """
+        if isinstance(source, bytes):
+            try:
+                data = _json_loads(source)
+            except ValueError:
+                # Não é um único documento JSON: trata como JSONL
+                yield from ContractParser._parse_records(source.splitlines(), skip_errors)
+                return
+            for record in (data if isinstance(data, list) else [data]):
+                yield ContractParser.parse_dict(record)
+            return
+
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+            if os.path.isdir(path):
+                paths = sorted(
+                    entry.path for entry in os.scandir(path)
+                    if entry.is_file() and fnmatch(entry.name, pattern)
+                )
+                yield from ContractParser._parse_paths(paths, workers, chunksize, skip_errors)
+            elif path.endswith(".jsonl"):
+                with open(path, "rb") as f:
+                    yield from ContractParser._parse_records(f, skip_errors)
+            else:
+                yield from ContractParser._parse_paths([path], 0, chunksize, skip_errors)
+            return
+
+        if hasattr(source, "read"):
+            yield from ContractParser._parse_records(source, skip_errors)
+            return
+
+        items = list(source)
+        if items and all(isinstance(i, (str, os.PathLike)) and os.path.isfile(i) for i in items):
+            yield from ContractParser._parse_paths(items, workers, chunksize, skip_errors)
+        else:
+            yield from ContractParser._parse_records(items, skip_errors)
+
+    @staticmethod
+    def _parse_records(records: Iterable, skip_errors: bool) -> Iterator[Contrato]:
+        for line_no, record in enumerate(records, 1):
+            if not record.strip():
+                continue
+            try:
+                yield ContractParser.parse(record)
+            except Exception as e:
+                if not skip_errors:
+                    raise
+                ContractParser.logger.warning(f"Registro {line_no} ignorado: {e}")
+
+    @staticmethod
+    def _parse_paths(paths: List[str], workers: int, chunksize: int,
+                     skip_errors: bool) -> Iterator[Contrato]:
+        if workers and workers > 1 and len(paths) > chunksize:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for path, contrato, error in pool.map(_parse_path_safe, paths, chunksize=chunksize):
+                    if error is not None:
+                        if not skip_errors:
+                            raise ValueError(f"Falha ao converter '{path}': {error}")
+                        ContractParser.logger.warning(f"Arquivo ignorado '{path}': {error}")
+                        continue
+                    yield contrato
+            return
+
+        for path in paths:
+            try:
+                contrato = ContractParser.parse_file(path)
+            except Exception as e:
+                if not skip_errors:
+                    raise
+                ContractParser.logger.warning(f"Arquivo ignorado '{path}': {e}")
+                continue
+            yield contrato
+
+    @staticmethod
+    def parse_into_batch(json_str: Union[str, bytes], batch: ItemBatch) -> int:
+        """
+        Lê os itens do JSON diretamente para o ItemBatch, sem criar objetos Item.
+        Retorna o índice do contrato no lote.
+        """
+        data = _json_loads(json_str)
+        idx = batch.add_contract(data.get("numero_contrato", ""))
+        for item_data in data.get("itens", []):
+            batch.append(
+                idx,
+                item_data.get("descricao", ""),
+                item_data.get("especificacao"),
+                item_data.get("unidade_medida"),
+                item_data.get("quantidade"),
+                item_data.get("valor_unitario"),
+                item_data.get("valor_total"),
+                item_data.get("catmat_catser"),
+                item_data.get("tipo", "Material"),
+                item_data.get("locais_execucao_entrega")
+            )
+        return idx
+
 # =========================================
 # ========== REPOSITORY CLASS =============
 # =========================================
 
+def _parse_path_safe(path: str):
+    """Executado nos processos do pool de ContractParser.parse_many."""
+    try:
+        return path, ContractParser.parse_file(path), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
 def is_valid_catmat(catmat: Optional[str]) -> bool:
     """
     Verifica se o catmat/catser é somente dígitos e tem mais de 2 dígitos.
@@ -148,15 +417,155 @@ def is_valid_catmat(catmat: Optional[str]) -> bool:
     return catmat.isdigit() and len(catmat) > 2
 
 
+def _copy_text_value(value) -> str:
+    """Formata um valor para o formato texto do COPY (NULL = \\N, escapes de controle)."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class LRUCache:
+    """Dicionário limitado a maxsize entradas, descartando a menos usada recentemente."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Tabelas de partes (órgãos e empresas), identificadas pelo CNPJ
+PARTY_TABLES = ("extrator.ext_orgao_contratante", "extrator.ext_empresa_contratada")
+
+# Antes do índice único: duplicatas de CNPJ são removidas, e os contratos que
+# apontavam para elas passam a apontar para o menor id do mesmo CNPJ
+PARTY_DEDUP_SQL = [
+    """
+    UPDATE extrator.ext_contratos c
+       SET orgao_contratante_id = d.keep_id
+      FROM (SELECT id, min(id) OVER (PARTITION BY cnpj) AS keep_id
+              FROM extrator.ext_orgao_contratante) d
+     WHERE c.orgao_contratante_id = d.id AND d.id <> d.keep_id
+    """,
+    """
+    DELETE FROM extrator.ext_orgao_contratante o
+     USING extrator.ext_orgao_contratante k
+     WHERE o.cnpj = k.cnpj AND o.id > k.id
+    """,
+    """
+    UPDATE extrator.ext_contratos c
+       SET empresa_contratada_id = d.keep_id
+      FROM (SELECT id, min(id) OVER (PARTITION BY cnpj) AS keep_id
+              FROM extrator.ext_empresa_contratada) d
+     WHERE c.empresa_contratada_id = d.id AND d.id <> d.keep_id
+    """,
+    """
+    DELETE FROM extrator.ext_empresa_contratada e
+     USING extrator.ext_empresa_contratada k
+     WHERE e.cnpj = k.cnpj AND e.id > k.id
+    """,
+]
+
+# CONCURRENTLY não bloqueia as gravações, mas não pode rodar dentro de transação
+PARTY_INDEX_DDL = [
+    "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ext_orgao_contratante_cnpj_key "
+    "ON extrator.ext_orgao_contratante (cnpj)",
+    "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ext_empresa_contratada_cnpj_key "
+    "ON extrator.ext_empresa_contratada (cnpj)",
+]
+
+# Tabelas (schema.nome) que já têm índice único válido só em cnpj
+PARTY_INDEX_CHECK_SQL = """
+    SELECT n.nspname || '.' || t.relname
+      FROM pg_index i
+      JOIN pg_class t ON t.oid = i.indrelid
+      JOIN pg_namespace n ON n.oid = t.relnamespace
+      JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0]
+     WHERE i.indisunique AND i.indisvalid AND i.indnatts = 1
+       AND a.attname = 'cnpj'
+       AND n.nspname || '.' || t.relname = ANY(%s)
+"""
+
+
 class ContractRepository:
     """
     Classe responsável por fazer a persistência no Postgres (schema extrator).
     Inclui logging e tratamento de exceções.
+
+    Mantém um cache LRU de CNPJ -> id para órgãos e empresas (opcionalmente
+    aquecido em lote na criação). Falhas de cache fazem um SELECT dos CNPJs e
+    um INSERT ... ON CONFLICT DO NOTHING RETURNING só dos que faltam. Sem os
+    índices únicos em cnpj (create_party_cnpj_indexes), processos concorrentes
+    podem duplicar uma parte; isso é verificado e avisado no primeiro uso.
+    IDs cacheados durante uma transação desfeita são descartados.
     """
 
-    def __init__(self, conn):
+    # Verificação dos índices únicos em cnpj: uma vez por processo
+    _party_indexes_checked = False
+
+    def __init__(self, conn, party_cache_size: int = 10000, warm_party_cache: bool = False):
         self.conn = conn
         self.logger = logging.getLogger(self.__class__.__name__)
+        self._orgao_ids = LRUCache(party_cache_size)
+        self._empresa_ids = LRUCache(party_cache_size)
+        # (cache, cnpj) adicionados na transação corrente
+        self._pending_party_ids = []
+        if warm_party_cache:
+            self.warm_party_cache()
+
+    def warm_party_cache(self):
+        """Carrega em lote os CNPJs/IDs mais recentes de órgãos e empresas."""
+        for table, cache in (
+            ("extrator.ext_orgao_contratante", self._orgao_ids),
+            ("extrator.ext_empresa_contratada", self._empresa_ids),
+        ):
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT cnpj, id FROM {table} ORDER BY id DESC LIMIT %s",
+                    (cache.maxsize,)
+                )
+                # Os mais recentes entram por último (mais "quentes" no LRU)
+                for cnpj, party_id in reversed(cur.fetchall()):
+                    cache.put(cnpj, party_id)
+        self.logger.info(
+            f"Cache de partes aquecido: {len(self._orgao_ids)} órgãos, "
+            f"{len(self._empresa_ids)} empresas."
+        )
+
+    def _cache_party_id(self, cache: LRUCache, cnpj: str, party_id: int):
+        cache.put(cnpj, party_id)
+        self._pending_party_ids.append((cache, cnpj))
+
+    def _commit_party_ids(self):
+        self._pending_party_ids.clear()
+
+    def _discard_party_ids(self):
+        """Após rollback: IDs inseridos na transação desfeita não existem mais."""
+        for cache, cnpj in self._pending_party_ids:
+            cache.pop(cnpj)
+        self._pending_party_ids.clear()
 
     def get_orgao_contratante_by_cnpj(self, cnpj: str) -> Optional[int]:
         sql = """
@@ -180,41 +589,91 @@ class ContractRepository:
             row = cur.fetchone()
             return row[0] if row else None
 
-    def insert_orgao_contratante(self, orgao: OrgaoContratante) -> int:
-        existing_id = self.get_orgao_contratante_by_cnpj(orgao.cnpj)
-        if existing_id is not None:
-            self.logger.debug(f"Órgão já existe (ID={existing_id}).")
-            return existing_id
+    def _check_party_indexes(self):
+        """Avisa, uma vez por processo, se falta o índice único em cnpj de alguma parte."""
+        if ContractRepository._party_indexes_checked:
+            return
+        ContractRepository._party_indexes_checked = True
+        with self.conn.cursor() as cur:
+            cur.execute(PARTY_INDEX_CHECK_SQL, (list(PARTY_TABLES),))
+            indexed = {row[0] for row in cur.fetchall()}
+        missing = [table for table in PARTY_TABLES if table not in indexed]
+        if missing:
+            self.logger.warning(
+                f"Sem índice único em cnpj: {', '.join(missing)}. Gravações concorrentes "
+                "podem duplicar órgãos/empresas; crie-os com "
+                "ContractRepository.create_party_cnpj_indexes()."
+            )
 
-        sql = """
-            INSERT INTO extrator.ext_orgao_contratante (
-                razao_social, sigla, cnpj
-            ) VALUES (%s, %s, %s)
-            RETURNING id
+    @staticmethod
+    def create_party_cnpj_indexes(conn):
         """
-        with self.conn.cursor() as cur:
-            cur.execute(sql, (orgao.razao_social, orgao.sigla, orgao.cnpj))
-            new_id = cur.fetchone()[0]
-            self.logger.debug(f"Órgão inserido com ID={new_id}.")
-            return new_id
+        Remove órgãos/empresas duplicados por CNPJ (numa transação) e cria os
+        índices únicos em cnpj. Rodar com a ingestão parada: uma duplicata
+        gravada entre as duas etapas faz o CREATE INDEX falhar (basta repetir).
+        A conexão termina em autocommit.
+        """
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                for sql in PARTY_DEDUP_SQL:
+                    cur.execute(sql)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for sql in PARTY_INDEX_DDL:
+                cur.execute(sql)
 
-    def insert_empresa_contratada(self, empresa: EmpresaContratada) -> int:
-        existing_id = self.get_empresa_contratada_by_cnpj(empresa.cnpj)
-        if existing_id is not None:
-            self.logger.debug(f"Empresa já existe (ID={existing_id}).")
-            return existing_id
+    def _resolve_party_id(self, cache: LRUCache, table: str, columns: Tuple[str, ...],
+                          cnpj: str, values: tuple) -> int:
+        """
+        ID da parte pelo CNPJ: cache, SELECT e, se não existir, INSERT ... ON
+        CONFLICT DO NOTHING. Se outro processo inseriu o mesmo CNPJ nesse meio
+        tempo, o INSERT não devolve linha e o id é lido de novo.
+        """
+        cached_id = cache.get(cnpj)
+        if cached_id is not None:
+            self.logger.debug(f"CNPJ {cnpj} em cache (ID={cached_id}).")
+            return cached_id
 
-        sql = """
-            INSERT INTO extrator.ext_empresa_contratada (
-                razao_social, cnpj
-            ) VALUES (%s, %s)
+        self._check_party_indexes()
+        select_sql = f"SELECT min(id) FROM {table} WHERE cnpj = %s"
+        insert_sql = f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+            ON CONFLICT DO NOTHING
             RETURNING id
         """
         with self.conn.cursor() as cur:
-            cur.execute(sql, (empresa.razao_social, empresa.cnpj))
-            new_id = cur.fetchone()[0]
-            self.logger.debug(f"Empresa inserida com ID={new_id}.")
-            return new_id
+            cur.execute(select_sql, (cnpj,))
+            party_id = cur.fetchone()[0]
+            if party_id is None:
+                cur.execute(insert_sql, values)
+                row = cur.fetchone()
+                if row is None:
+                    cur.execute(select_sql, (cnpj,))
+                    row = cur.fetchone()
+                party_id = row[0]
+            self.logger.debug(f"CNPJ {cnpj} resolvido em {table} com ID={party_id}.")
+        self._cache_party_id(cache, cnpj, party_id)
+        return party_id
+
+    def insert_orgao_contratante(self, orgao: OrgaoContratante) -> int:
+        return self._resolve_party_id(
+            self._orgao_ids, "extrator.ext_orgao_contratante",
+            ("razao_social", "sigla", "cnpj"),
+            orgao.cnpj, (orgao.razao_social, orgao.sigla, orgao.cnpj)
+        )
+
+    def insert_empresa_contratada(self, empresa: EmpresaContratada) -> int:
+        return self._resolve_party_id(
+            self._empresa_ids, "extrator.ext_empresa_contratada",
+            ("razao_social", "cnpj"),
+            empresa.cnpj, (empresa.razao_social, empresa.cnpj)
+        )
 
     def insert_contrato(self, contrato: Contrato,
                         orgao_id: int,
@@ -347,15 +806,7 @@ class ContractRepository:
 
         # -----------------------------------------------------------------
         # FILTRAR itens que não tenham catmat/catser válido, antes de inserir.
-        valid_items = []
-        for item in contrato.itens:
-            if is_valid_catmat(item.catmat_catser):
-                valid_items.append(item)
-            else:
-                self.logger.info(
-                    f"[persist_contract] Descartando item com catmat_catser inválido: {item.catmat_catser}"
-                )
-        contrato.itens = valid_items
+        self._filter_valid_items(contrato)
         # -----------------------------------------------------------------
 
         qtd_itens = len(contrato.itens)
@@ -371,9 +822,11 @@ class ContractRepository:
                 self.insert_item(item, contrato_id)
 
             self.conn.commit()
+            self._commit_party_ids()
 
         except Exception as e:
             self.conn.rollback()
+            self._discard_party_ids()
             log_status = "Falha"
             log_msg = f"Erro ao processar contrato: {e}"
             self.logger.error(f"Falha no processamento do contrato {contrato.numero_contrato}.", exc_info=True)
@@ -392,6 +845,283 @@ class ContractRepository:
             except Exception as e_log:
                 self.logger.error("Falha ao registrar log do extrator.", exc_info=True)
 
+        return log_status == "Sucesso"
+
+    def _filter_valid_items(self, contrato: Contrato):
+        """Remove do contrato os itens sem catmat/catser válido."""
+        valid_items = []
+        for item in contrato.itens:
+            if is_valid_catmat(item.catmat_catser):
+                valid_items.append(item)
+            else:
+                self.logger.info(
+                    f"[persist_contract] Descartando item com catmat_catser inválido: {item.catmat_catser}"
+                )
+        contrato.itens = valid_items
+
+    @staticmethod
+    def _parse_data_celebracao(contrato: Contrato):
+        if not contrato.data_celebracao:
+            return None
+        try:
+            return datetime.strptime(contrato.data_celebracao, "%d/%m/%Y").date()
+        except ValueError:
+            return None
+
+    # -----------------------------------------------------------------
+    # Persistência em lote
+    # -----------------------------------------------------------------
+
+    def _upsert_parties_bulk(self, cache: LRUCache, table: str, columns: Tuple[str, ...],
+                             parties: list, row) -> Dict[str, int]:
+        """
+        Resolve os IDs de várias partes: primeiro no cache; as faltantes com um
+        SELECT ... WHERE cnpj = ANY e, para as que não existem, um único
+        INSERT ... ON CONFLICT DO NOTHING RETURNING multi-linha. CNPJs que o
+        INSERT não devolve (inseridos por outro processo) são lidos de novo.
+        """
+        from psycopg2.extras import execute_values
+
+        ids = {}
+        missing = {}
+        for party in parties:
+            if party.cnpj in ids or party.cnpj in missing:
+                continue
+            cached_id = cache.get(party.cnpj)
+            if cached_id is not None:
+                ids[party.cnpj] = cached_id
+            else:
+                missing[party.cnpj] = party
+
+        if missing:
+            self._check_party_indexes()
+            select_sql = f"SELECT cnpj, min(id) FROM {table} WHERE cnpj = ANY(%s) GROUP BY cnpj"
+            insert_sql = f"""
+                INSERT INTO {table} ({', '.join(columns)})
+                VALUES %s
+                ON CONFLICT DO NOTHING
+                RETURNING cnpj, id
+            """
+            with self.conn.cursor() as cur:
+                cur.execute(select_sql, (list(missing),))
+                rows = cur.fetchall()
+                existing = {cnpj for cnpj, _ in rows}
+                new = [party for cnpj, party in missing.items() if cnpj not in existing]
+                if new:
+                    inserted = execute_values(
+                        cur, insert_sql, [row(p) for p in new],
+                        page_size=len(new), fetch=True
+                    )
+                    rows += inserted
+                    lost = {p.cnpj for p in new} - {cnpj for cnpj, _ in inserted}
+                    if lost:
+                        cur.execute(select_sql, (list(lost),))
+                        rows += cur.fetchall()
+            for cnpj, party_id in rows:
+                ids[cnpj] = party_id
+                self._cache_party_id(cache, cnpj, party_id)
+        return ids
+
+    def _upsert_orgaos_bulk(self, orgaos: List[OrgaoContratante]) -> Dict[str, int]:
+        return self._upsert_parties_bulk(
+            self._orgao_ids,
+            "extrator.ext_orgao_contratante",
+            ("razao_social", "sigla", "cnpj"),
+            orgaos,
+            lambda o: (o.razao_social, o.sigla, o.cnpj)
+        )
+
+    def _upsert_empresas_bulk(self, empresas: List[EmpresaContratada]) -> Dict[str, int]:
+        return self._upsert_parties_bulk(
+            self._empresa_ids,
+            "extrator.ext_empresa_contratada",
+            ("razao_social", "cnpj"),
+            empresas,
+            lambda e: (e.razao_social, e.cnpj)
+        )
+
+    def _copy_items(self, rows: List[tuple]):
+        """Envia todos os itens do lote com um único COPY (formato texto)."""
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_text_value(v) for v in row))
+            buffer.write("\n")
+        buffer.seek(0)
+        with self.conn.cursor() as cur:
+            cur.copy_expert(
+                """
+                COPY extrator.ext_itens (
+                    contrato_id,
+                    descricao,
+                    especificacao,
+                    unidade_medida,
+                    quantidade,
+                    valor_unitario,
+                    valor_total,
+                    catmat_catser,
+                    tipo,
+                    locais_execucao_entrega
+                ) FROM STDIN
+                """,
+                buffer
+            )
+
+    def _persist_batch(self, contratos: List[Contrato]):
+        """Grava um lote de contratos (partes, contratos e itens) na transação corrente."""
+        from psycopg2.extras import execute_values
+
+        orgao_ids = self._upsert_orgaos_bulk([c.orgao_contratante for c in contratos])
+        empresa_ids = self._upsert_empresas_bulk([c.empresa_contratada for c in contratos])
+
+        contrato_rows = [
+            (
+                c.numero_contrato,
+                c.tipo_instrumento,
+                c.processo_administrativo,
+                self._parse_data_celebracao(c),
+                c.fonte_preco,
+                c.referencia_contrato,
+                c.anexo_contrato,
+                c.status_extracao,
+                orgao_ids[c.orgao_contratante.cnpj],
+                empresa_ids[c.empresa_contratada.cnpj]
+            )
+            for c in contratos
+        ]
+        with self.conn.cursor() as cur:
+            # Os IDs retornam na mesma ordem das linhas do VALUES
+            returned = execute_values(
+                cur,
+                """
+                INSERT INTO extrator.ext_contratos (
+                    numero_contrato,
+                    tipo_instrumento,
+                    processo_administrativo,
+                    data_celebracao,
+                    fonte_preco,
+                    referencia_contrato,
+                    anexo_contrato,
+                    status_extracao,
+                    orgao_contratante_id,
+                    empresa_contratada_id
+                )
+                VALUES %s
+                RETURNING id
+                """,
+                contrato_rows,
+                page_size=len(contrato_rows),
+                fetch=True
+            )
+        contrato_ids = [row[0] for row in returned]
+
+        item_rows = [
+            (
+                contrato_id,
+                item.descricao,
+                item.especificacao,
+                item.unidade_medida,
+                item.quantidade,
+                item.valor_unitario,
+                item.valor_total,
+                item.catmat_catser,
+                item.tipo,
+                item.locais_execucao_entrega
+            )
+            for contrato, contrato_id in zip(contratos, contrato_ids)
+            for item in contrato.itens
+        ]
+        if item_rows:
+            self._copy_items(item_rows)
+
+    def insert_logs_bulk(self, logs: List[tuple]):
+        """
+        Grava várias linhas em extrator.ext_log_extrator com um único INSERT.
+        Cada tupla: (cnpj_orgao, cnpj_empresa, numero_contrato, data_contrato,
+        quantidade_itens, status_execucao, mensagem_log).
+        """
+        from psycopg2.extras import execute_values
+
+        if not logs:
+            return
+        with self.conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO extrator.ext_log_extrator (
+                    data_registro,
+                    cnpj_orgao,
+                    cnpj_empresa,
+                    numero_contrato,
+                    data_contrato,
+                    quantidade_itens,
+                    status_execucao,
+                    mensagem_log
+                )
+                VALUES %s
+                """,
+                logs,
+                template="(now(), %s, %s, %s, %s, %s, %s, %s)",
+                page_size=len(logs)
+            )
+
+    def persist_many(self, contratos: List[Contrato], batch_size: int = 200) -> Tuple[int, int]:
+        """
+        Persiste vários contratos com poucas idas ao banco: partes resolvidas em
+        conjunto, contratos em INSERT multi-linha, itens via COPY e logs em lote.
+        Cada lote de batch_size contratos é uma transação. Se um lote falhar, ele é
+        refeito contrato a contrato (persist_contract), para isolar o registro ruim.
+        Retorna (sucessos, falhas).
+        """
+        contratos = list(contratos)
+        success_count = 0
+        failure_count = 0
+
+        for start in range(0, len(contratos), batch_size):
+            batch = contratos[start:start + batch_size]
+            for contrato in batch:
+                self._filter_valid_items(contrato)
+
+            try:
+                self.conn.autocommit = False
+                self._persist_batch(batch)
+                self.conn.commit()
+                self._commit_party_ids()
+            except Exception:
+                self.conn.rollback()
+                self._discard_party_ids()
+                self.logger.warning(
+                    f"Falha no lote de {len(batch)} contratos; refazendo um a um.", exc_info=True
+                )
+                self.conn.autocommit = True
+                for contrato in batch:
+                    if self.persist_contract(contrato):
+                        success_count += 1
+                    else:
+                        failure_count += 1
+                continue
+            finally:
+                self.conn.autocommit = True
+
+            success_count += len(batch)
+            self.logger.info(f"Lote de {len(batch)} contratos persistido.")
+            try:
+                self.insert_logs_bulk([
+                    (
+                        c.orgao_contratante.cnpj,
+                        c.empresa_contratada.cnpj,
+                        c.numero_contrato,
+                        self._parse_data_celebracao(c),
+                        len(c.itens),
+                        "Sucesso",
+                        "Contrato processado com sucesso."
+                    )
+                    for c in batch
+                ])
+            except Exception:
+                self.logger.error("Falha ao registrar log do extrator.", exc_info=True)
+
+        return success_count, failure_count
+
 
 def generate_sql_script(contrato: Contrato, filename: str) -> str:
     """
@@ -530,3 +1260,288 @@ SELECT id FROM contrato_inserido;
 """)
 
     return "\n".join(script_lines)
+
+
+# =========================================
+# ========== PRECOS WRITER (POOL) =========
+# =========================================
+
+# Statements preparados no servidor, uma vez por conexão (nome -> SQL).
+# Os itens vão como arrays paralelos (unnest), então um contrato com N itens
+# é sempre um único EXECUTE com o mesmo plano, independente de N.
+PRECOS_PREPARED_STATEMENTS = {
+    "precos_upsert_orgao": """
+        PREPARE precos_upsert_orgao (text, text, text) AS
+        INSERT INTO precos.orgao_contratante (razao_social, sigla, cnpj)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (cnpj) DO NOTHING
+    """,
+    "precos_upsert_empresa": """
+        PREPARE precos_upsert_empresa (text, text) AS
+        INSERT INTO precos.empresa_contratada (razao_social, cnpj)
+        VALUES ($1, $2)
+        ON CONFLICT (cnpj) DO NOTHING
+    """,
+    "precos_insert_contrato": """
+        PREPARE precos_insert_contrato (
+            text, text, text, text, text, text, text, text, text, text,
+            text[], text[], text[], text[], text[], text[], text[], text[], text[]
+        ) AS
+        WITH contrato_inserido AS (
+          INSERT INTO precos.contratos (
+            numero_contrato,
+            tipo_instrumento,
+            processo_administrativo,
+            data_celebracao,
+            fonte_preco,
+            referencia_contrato,
+            url_pdf_s3,
+            status_extracao,
+            orgao_contratante_id,
+            empresa_contratada_id
+          )
+          VALUES (
+            $1,
+            $2,
+            $3,
+            TO_DATE($4, 'DD/MM/YYYY'),
+            $5,
+            $6,
+            $7,
+            $8,
+            (SELECT id FROM precos.orgao_contratante WHERE cnpj = $9 LIMIT 1),
+            (SELECT id FROM precos.empresa_contratada WHERE cnpj = $10 LIMIT 1)
+          )
+          RETURNING id
+        )
+        INSERT INTO precos.itens (
+          contrato_id,
+          descricao,
+          especificacao,
+          unidade_medida,
+          quantidade,
+          valor_unitario,
+          valor_total,
+          catmat_catser,
+          tipo,
+          locais_execucao_entrega
+        )
+        SELECT contrato_inserido.id, i.*
+          FROM contrato_inserido,
+               unnest($11, $12, $13, $14, $15, $16, $17, $18, $19)
+               AS i(descricao, especificacao, unidade_medida, quantidade, valor_unitario,
+                    valor_total, catmat_catser, tipo, locais_execucao_entrega)
+    """,
+}
+
+
+class PrecosWriter:
+    """
+    Grava contratos no schema precos (v4) com statements preparados no servidor
+    (PREPARE uma vez por conexão, EXECUTE por contrato), reutilizando conexões
+    de um pool entre documentos. Os valores dos EXECUTEs são literais escapados
+    pelo psycopg2 no cliente (cur.mogrify), não parâmetros do protocolo: o
+    psycopg2 não envia parâmetros separados do texto do comando. O escape é o
+    mesmo de cur.execute(sql, params); o ganho vem do plano reaproveitado e de
+    vários EXECUTEs irem ao banco em uma só ida.
+    Substitui a execução do texto gerado por generate_sql_script, que continua
+    disponível apenas como artefato de auditoria (.sql).
+
+    Os contratos podem ser acumulados com add() e enviados juntos: cada grupo de
+    até pipeline_size contratos vai ao banco em uma única ida (EXECUTEs
+    concatenados) e em uma única transação.
+    """
+
+    def __init__(self, minconn: int = 1, maxconn: int = 4, pipeline_size: int = 1, **dsn):
+        from psycopg2.pool import ThreadedConnectionPool
+        self.pool = ThreadedConnectionPool(minconn, maxconn, **dsn)
+        self.pipeline_size = max(1, pipeline_size)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        # Conexões (por id) que já têm os statements preparados
+        self._prepared = {}
+        self._pending = []
+
+    def _checkout(self):
+        conn = self.pool.getconn()
+        if id(conn) not in self._prepared or self._prepared[id(conn)] is not conn:
+            try:
+                with conn.cursor() as cur:
+                    for sql in PRECOS_PREPARED_STATEMENTS.values():
+                        cur.execute(sql)
+                conn.commit()
+            except Exception:
+                # Transação abortada ou statement já preparado pela metade:
+                # a conexão é descartada (um PREPARE vale só para a sessão)
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                self._release(conn, broken=True)
+                raise
+            self._prepared[id(conn)] = conn
+        return conn
+
+    def _release(self, conn, broken: bool = False):
+        if broken:
+            self._prepared.pop(id(conn), None)
+        self.pool.putconn(conn, close=broken)
+
+    @staticmethod
+    def _contract_params(contrato: Contrato, filename: str) -> list:
+        """Parâmetros na mesma normalização do generate_sql_script (None -> '')."""
+        valid_items = [it for it in contrato.itens if is_valid_catmat(it.catmat_catser)]
+
+        def col(attr):
+            return [getattr(it, attr) or "" for it in valid_items]
+
+        return [
+            [
+                contrato.orgao_contratante.razao_social or "",
+                contrato.orgao_contratante.sigla or "",
+                contrato.orgao_contratante.cnpj,
+            ],
+            [
+                contrato.empresa_contratada.razao_social or "",
+                contrato.empresa_contratada.cnpj,
+            ],
+            [
+                contrato.numero_contrato or "",
+                contrato.tipo_instrumento or "",
+                contrato.processo_administrativo or "",
+                contrato.data_celebracao or None,
+                contrato.fonte_preco or "",
+                contrato.referencia_contrato or "",
+                f"s3://compras-ia-np/Contratos/{filename}",
+                contrato.status_extracao or "",
+                contrato.orgao_contratante.cnpj,
+                contrato.empresa_contratada.cnpj,
+                col("descricao"),
+                col("especificacao"),
+                col("unidade_medida"),
+                col("quantidade"),
+                col("valor_unitario"),
+                col("valor_total"),
+                col("catmat_catser"),
+                col("tipo"),
+                col("locais_execucao_entrega"),
+            ],
+        ]
+
+    @staticmethod
+    def _statements(cur, contrato: Contrato, filename: str) -> List[bytes]:
+        orgao, empresa, contrato_params = PrecosWriter._contract_params(contrato, filename)
+        return [
+            cur.mogrify("EXECUTE precos_upsert_orgao (%s, %s, %s)", orgao),
+            cur.mogrify("EXECUTE precos_upsert_empresa (%s, %s)", empresa),
+            cur.mogrify(
+                "EXECUTE precos_insert_contrato ("
+                + ", ".join(["%s"] * len(contrato_params))
+                + ")",
+                contrato_params
+            ),
+        ]
+
+    def _write_group(self, conn, group: List[Tuple[Contrato, str, Any]]):
+        with conn.cursor() as cur:
+            statements = []
+            for contrato, filename, _ in group:
+                statements.extend(self._statements(cur, contrato, filename))
+            cur.execute(b";\n".join(statements))
+        conn.commit()
+
+    def _rollback(self, conn) -> bool:
+        """Desfaz a transação; False se a conexão caiu (o próprio rollback falha)."""
+        try:
+            conn.rollback()
+            return True
+        except Exception:
+            self.logger.error("Conexão perdida durante a gravação no schema precos.", exc_info=True)
+            return False
+
+    def write_many(self, contratos: List[tuple]) -> Dict[Any, bool]:
+        """
+        Grava uma lista de (contrato, filename) ou (contrato, filename, chave).
+        Retorna {chave: sucesso}; sem chave, vale o filename (nomes repetidos se
+        confundem, então quem precisa distinguir documentos passa a chave).
+        Se um grupo falhar, ele é refeito contrato a contrato para isolar o erro.
+        Se a conexão cair, os contratos ainda não gravados ficam com False.
+        """
+        import psycopg2
+
+        contratos = [(c[0], c[1], c[2] if len(c) > 2 else c[1]) for c in contratos]
+        results = {}
+        conn = self._checkout()
+        lost = False
+        try:
+            for start in range(0, len(contratos), self.pipeline_size):
+                group = contratos[start:start + self.pipeline_size]
+                try:
+                    self._write_group(conn, group)
+                    for _, _, key in group:
+                        results[key] = True
+                    continue
+                except psycopg2.Error:
+                    if not self._rollback(conn):
+                        lost = True
+                        break
+                    if len(group) == 1:
+                        self.logger.error(
+                            f"Erro ao gravar contrato de '{group[0][1]}' no schema precos.",
+                            exc_info=True
+                        )
+                        results[group[0][2]] = False
+                        continue
+
+                for entry in group:
+                    try:
+                        self._write_group(conn, [entry])
+                        results[entry[2]] = True
+                    except psycopg2.Error:
+                        self.logger.error(
+                            f"Erro ao gravar contrato de '{entry[1]}' no schema precos.",
+                            exc_info=True
+                        )
+                        results[entry[2]] = False
+                        if not self._rollback(conn):
+                            lost = True
+                            break
+                if lost:
+                    break
+        finally:
+            # Conexão perdida no meio do caminho é descartada do pool
+            self._release(conn, broken=lost or bool(conn.closed))
+
+        for _, filename, key in contratos:
+            if key not in results:
+                self.logger.error(f"Contrato de '{filename}' não gravado: conexão perdida.")
+                results[key] = False
+        return results
+
+    def write(self, contrato: Contrato, filename: str) -> bool:
+        """Grava um único contrato imediatamente."""
+        return self.write_many([(contrato, filename)])[filename]
+
+    def add(self, contrato: Contrato, filename: str, key: Any = None) -> Dict[Any, bool]:
+        """
+        Acumula o contrato; envia o grupo quando atingir pipeline_size.
+        O resultado do contrato sai sob `key` (padrão: filename), ver write_many.
+        """
+        self._pending.append((contrato, filename, filename if key is None else key))
+        if len(self._pending) >= self.pipeline_size:
+            return self.flush()
+        return {}
+
+    def flush(self) -> Dict[Any, bool]:
+        """Envia os contratos acumulados por add()."""
+        if not self._pending:
+            return {}
+        pending, self._pending = self._pending, []
+        return self.write_many(pending)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.pool.closeall()
+            self._prepared.clear()
+
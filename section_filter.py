@@ -0,0 +1,117 @@
+# section_filter.py
+import re
+from typing import Dict, List, Tuple
+
+CNPJ_RE = re.compile(r'\b\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}\b')
+MONEY_RE = re.compile(r'R\$\s*\d{1,3}(?:\.?\d{3})*(?:,\d{2})?')
+DATE_RE = re.compile(
+    r'\b\d{1,2}/\d{1,2}/\d{4}\b'
+    r'|\b\d{1,2}\s+de\s+(?:janeiro|fevereiro|março|marco|abril|maio|junho|julho|agosto'
+    r'|setembro|outubro|novembro|dezembro)\s+de\s+\d{4}\b',
+    re.IGNORECASE
+)
+
+# Palavras-chave por seção relevante para os campos do prompt
+KEYWORDS = {
+    'cabecalho': [
+        'contrato n', 'termo aditivo', 'termo de contrato', 'nota de empenho',
+        'processo', 'pregão', 'pregao', 'dispensa', 'inexigibilidade', 'ata de registro',
+    ],
+    'partes': [
+        'contratante', 'contratada', 'cnpj', 'razão social', 'razao social',
+        'inscrit', 'sediad', 'representad', 'pessoa jurídica',
+    ],
+    'itens': [
+        'item', 'itens', 'quantidade', 'qtd', 'qtde', 'unidade', 'valor unitário',
+        'valor unitario', 'valor total', 'catmat', 'catser', 'lote', 'especificação',
+        'especificacao', 'descrição', 'descricao', 'preço', 'preco', 'local de entrega',
+        'locais de execução', 'fornecimento',
+    ],
+    'assinatura': [
+        'documento assinado eletronicamente', 'código verificador', 'codigo verificador',
+        'sei nº', 'processo sei', 'assinatura', 'testemunhas', 'brasília', 'de acordo',
+    ],
+}
+
+# Termos típicos de cláusulas padrão que não alimentam nenhum campo do prompt
+BOILERPLATE = [
+    'das obrigações', 'das obrigacoes', 'das sanções', 'das sancoes', 'da rescisão',
+    'da rescisao', 'do foro', 'penalidade', 'lei nº 8.666', 'lei nº 14.133',
+    'casos omissos', 'da fiscalização', 'da fiscalizacao', 'da garantia',
+]
+
+OMITTED_MARKER = "\n[...]\n"
+
+
+def _score_block(block: str) -> int:
+    lower = block.lower()
+    score = 0
+    strong = 3 * min(len(CNPJ_RE.findall(block)), 3) + 2 * min(len(MONEY_RE.findall(block)), 5)
+    score += strong
+    if DATE_RE.search(block):
+        score += 1
+    for words in KEYWORDS.values():
+        score += sum(1 for w in words if w in lower)
+
+    # Linhas densas em números costumam ser tabelas de itens
+    digits = sum(c.isdigit() for c in block)
+    if block and digits / len(block) > 0.12:
+        score += 2
+
+    # Cláusulas padrão só perdem pontos se não trouxerem CNPJ ou valores
+    if not strong:
+        score -= 2 * sum(1 for w in BOILERPLATE if w in lower)
+    return score
+
+
+def _blocks(text: str, block_lines: int) -> List[str]:
+    """Agrupa o texto em blocos de até block_lines linhas (mantendo as quebras)."""
+    lines = text.splitlines(keepends=True)
+    return ["".join(lines[i:i + block_lines]) for i in range(0, len(lines), block_lines)]
+
+
+def filter_relevant_sections(text: str, head_chars: int = 3000, tail_chars: int = 2000,
+                             threshold: int = 3, block_lines: int = 1,
+                             context: int = 2) -> Tuple[str, Dict[str, int]]:
+    """
+    Mantém só as partes do texto que alimentam os campos do prompt:
+    cabeçalho (início do documento), bloco das partes com CNPJ, tabelas de
+    itens e preços, e bloco de assinatura/data SEI (final do documento).
+    Cada bloco de linhas recebe uma pontuação por regex e palavras-chave;
+    são mantidos os blocos com pontuação >= threshold, seus `context` vizinhos,
+    e sempre os primeiros head_chars e os últimos tail_chars caracteres.
+    Retorna (texto_filtrado, estatísticas de caracteres mantidos/descartados).
+    """
+    blocks = _blocks(text, block_lines)
+    keep = [False] * len(blocks)
+
+    offset = 0
+    total = len(text)
+    for i, block in enumerate(blocks):
+        start, end = offset, offset + len(block)
+        offset = end
+        if start < head_chars or end > total - tail_chars:
+            keep[i] = True
+        elif _score_block(block) >= threshold:
+            for j in range(max(0, i - context), min(len(blocks), i + context + 1)):
+                keep[j] = True
+
+    parts = []
+    omitted = False
+    for block, kept in zip(blocks, keep):
+        if kept:
+            if omitted and parts:
+                parts.append(OMITTED_MARKER)
+            parts.append(block)
+            omitted = False
+        else:
+            omitted = True
+
+    filtered = "".join(parts)
+    kept_chars = sum(len(b) for b, k in zip(blocks, keep) if k)
+    stats = {
+        'chars_total': total,
+        'chars_kept': kept_chars,
+        'chars_dropped': total - kept_chars,
+    }
+    return filtered, stats
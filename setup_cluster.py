@@ -1,11 +1,12 @@
 # setup_cluster.py
-from dask.distributed import LocalCluster, Client
+from dask.distributed import Client, Nanny, Scheduler, SpecCluster, WorkerPlugin
 import sys
 import os
+import asyncio
 import logging
 import dask
+from worker import EXTRACT_RESOURCE, LLM_RESOURCE
 
-dask.config.set({"distributed.comm.tcp.high-water": "1GiB"})
 dask.config.set({"distributed.worker.memory.target": 0.85})
 dask.config.set({"distributed.worker.memory.spill": 0.90})
 dask.config.set({"distributed.worker.memory.pause": 0.95})
@@ -16,58 +17,137 @@ logging.basicConfig(
 )
 logger = logging.getLogger("DaskCluster")
 
+# Pools de workers do nó master. A extração de texto é CPU-bound e segura o GIL:
+# vários processos com poucas threads, recurso EXTRACT. A análise com IA passa
+# quase todo o tempo esperando a rede: um processo com muitas threads, recurso LLM.
+# Cada thread vale uma unidade do recurso do pool. Os trechos de documentos
+# longos rodam dentro da tarefa do documento (não pedem unidades de LLM).
+EXTRACT_POOL = {'workers': 4, 'threads': 2, 'memory_limit': "4GB"}
+LLM_POOL = {'workers': 1, 'threads': 32, 'memory_limit': "8GB"}
+POOLS = {'extract': (EXTRACT_POOL, EXTRACT_RESOURCE), 'llm': (LLM_POOL, LLM_RESOURCE)}
+
+
+class WorkerResourcesPlugin(WorkerPlugin):
+    """
+    Cria os recursos de vida longa (cliente Gemini, túnel SSH, pool de conexões)
+    uma única vez por processo de worker, na subida, e os libera no encerramento.
+    Registrado pelo client, vale também para workers que entrarem depois.
+    """
+    name = "worker-resources"
+
+    def __init__(self, processes=None):
+        # Número de processos que dividem a cota da API (ver CONFIG['gemini']['rate_limit']).
+        # None = contar, ao criar o cliente Gemini, os workers do cluster com recurso LLM.
+        self.processes = processes
+
+    def setup(self, worker):
+        from worker import init_worker_resources
+        init_worker_resources(processes=self.processes)
+        logger.info(f"Recursos do worker {worker.address} inicializados.")
+
+    def teardown(self, worker):
+        from worker import close_worker_resources
+        close_worker_resources()
+
+def _pool_specs(prefix, pool, resource):
+    return {
+        f"{prefix}-{i}": {
+            "cls": Nanny,
+            "options": {
+                "nthreads": pool['threads'],
+                "memory_limit": pool['memory_limit'],
+                "resources": {resource: pool['threads']},
+                "local_directory": "/tmp/dask-master",
+            },
+        }
+        for i in range(pool['workers'])
+    }
+
+
 def setup_master_scheduler():
-    """Inicia o nó master (scheduler + worker)."""
-    cluster = LocalCluster(
-        scheduler_port=8786,
-        dashboard_address=':8787',
-        processes=True,
-        n_workers=2,
-        threads_per_worker=12,
-        memory_limit="24GB",
-        local_directory="/tmp/dask-master"
+    """
+    Inicia o nó master (scheduler + workers), com um pool de extração e outro
+    de IA (ver EXTRACT_POOL / LLM_POOL); as tarefas escolhem o pool pelo recurso.
+    """
+    workers = {}
+    workers.update(_pool_specs("extract", EXTRACT_POOL, EXTRACT_RESOURCE))
+    workers.update(_pool_specs("llm", LLM_POOL, LLM_RESOURCE))
+    cluster = SpecCluster(
+        workers=workers,
+        scheduler={
+            "cls": Scheduler,
+            "options": {"port": 8786, "dashboard_address": ':8787'},
+        },
     )
     client = Client(cluster)
-    
+    # A cota é dividida entre os processos com recurso LLM, contando os que
+    # entrarem de outras máquinas (setup_worker ... llm)
+    client.register_worker_plugin(WorkerResourcesPlugin())
+
     scheduler_ip = cluster.scheduler_address
     logger.info(f"Master+Scheduler iniciado em {scheduler_ip}")
     logger.info(f"Dashboard disponível em http://localhost:8787/status")
-    logger.info("Recursos alocados: 8 threads, 24GB RAM")
-    
+    logger.info(
+        f"Pools: extração {EXTRACT_POOL['workers']} processo(s) x {EXTRACT_POOL['threads']} thread(s); "
+        f"IA {LLM_POOL['workers']} processo(s) x {LLM_POOL['threads']} thread(s)"
+    )
+
     return cluster, client
 
-def setup_worker(scheduler_address, n_cores=None, memory_limit=None):
-    """Inicia um worker conectado ao scheduler."""
-    if n_cores is None:
-        n_cores = 12
-    
-    if memory_limit is None:
-        memory_limit = "26GB"
-    
+def setup_worker(scheduler_address, role, n_cores=None, memory_limit=None):
+    """
+    Inicia nesta máquina um pool de workers ('extract' ou 'llm', como os do
+    master) conectado ao scheduler, com o recurso correspondente para receber
+    as tarefas. Bloqueia até os workers encerrarem (Ctrl+C).
+    """
+    pool, resource = POOLS[role]
+    n_workers = pool['workers']
+    n_cores = n_cores or pool['threads']
+    memory_limit = memory_limit or pool['memory_limit']
+
     temp_dir = f"/tmp/dask-worker-{os.getpid()}"
     os.makedirs(temp_dir, exist_ok=True)
-    
+
+    async def run():
+        nannies = [
+            Nanny(
+                scheduler_address,
+                nthreads=n_cores,
+                memory_limit=memory_limit,
+                resources={resource: n_cores},
+                local_directory=temp_dir,
+            )
+            for _ in range(n_workers)
+        ]
+        try:
+            await asyncio.gather(*nannies)
+            logger.info(f"Pool '{role}' conectado ao scheduler {scheduler_address}")
+            logger.info(
+                f"Recursos: {n_workers} processo(s) x {n_cores} thread(s), {memory_limit} RAM cada, "
+                f"{resource}={n_cores}"
+            )
+            logger.info(f"Diretório temporário: {temp_dir}")
+            await asyncio.gather(*(nanny.finished() for nanny in nannies))
+        finally:
+            await asyncio.gather(*(nanny.close() for nanny in nannies), return_exceptions=True)
+
     try:
-        client = Client(
-            scheduler_address,
-            local_directory=temp_dir,
-            memory_limit=memory_limit,
-            n_workers=1,
-            threads_per_worker=n_cores
-        )
-        logger.info(f"Worker conectado ao scheduler {scheduler_address}")
-        logger.info(f"Recursos: {n_cores} threads, {memory_limit} RAM")
-        logger.info(f"Diretório temporário: {temp_dir}")
-        return client
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
-        logger.error(f"Erro ao conectar ao scheduler: {e}")
-        return None
+        logger.error(f"Erro ao iniciar os workers: {e}")
+        return False
+    return True
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Uso: python setup_cluster.py [master|worker] [opções]")
         print("  Para iniciar master+scheduler: python setup_cluster.py master")
-        print("  Para iniciar worker: python setup_cluster.py worker tcp://ip-do-master:8786 [n_cores] [memory_limit]")
+        print("  Para iniciar workers: python setup_cluster.py worker tcp://ip-do-master:8786 [extract|llm] [n_cores] [memory_limit]")
+        print("    extract = extração de texto (CPU); llm = análise com IA (padrão)")
+        print("    A cota da API (rpm/tpm) é dividida entre os workers llm do cluster, recontados")
+        print("    a cada rate_limit.recount_interval s; rate_limit.processes fixa esse número.")
         sys.exit(1)
         
     mode = sys.argv[1].lower()
@@ -88,18 +168,14 @@ if __name__ == "__main__":
             sys.exit(1)
             
         scheduler_address = sys.argv[2]
-        n_cores = int(sys.argv[3]) if len(sys.argv) > 3 else None
-        memory_limit = sys.argv[4] if len(sys.argv) > 4 else None
-        
-        client = setup_worker(scheduler_address, n_cores, memory_limit)
-        if client:
-            try:
-                input("Worker em execução. Pressione Enter para encerrar...")
-            except KeyboardInterrupt:
-                pass
-            finally:
-                client.close()
-        else:
+        role = sys.argv[3].lower() if len(sys.argv) > 3 else "llm"
+        if role not in POOLS:
+            print(f"Tipo de worker desconhecido: {role} (use extract ou llm)")
+            sys.exit(1)
+        n_cores = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        memory_limit = sys.argv[5] if len(sys.argv) > 5 else None
+
+        if not setup_worker(scheduler_address, role, n_cores, memory_limit):
             sys.exit(1)
     else:
         print(f"Modo desconhecido: {mode}")
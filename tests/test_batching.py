@@ -0,0 +1,91 @@
+# tests/test_batching.py
+import json
+import threading
+
+from batching import SmallDocumentBatcher, batch_text, document_id, split_batch_response
+
+
+def test_batch_text_delimita_cada_documento():
+    text = batch_text({"DOC_1": "contrato um", "DOC_2": "contrato dois"})
+    assert "=== DOC_1 ===\ncontrato um" in text
+    assert "=== DOC_2 ===\ncontrato dois" in text
+    assert "2 documentos" in text
+
+
+def test_split_batch_response():
+    response = json.dumps({"DOC_1": {"numero_contrato": "1/2024"}, "DOC_2": "não é objeto"})
+    results = split_batch_response(response, ["DOC_1", "DOC_2", "DOC_3"])
+    assert json.loads(results["DOC_1"]) == {"numero_contrato": "1/2024"}
+    assert results["DOC_2"] is None
+    assert results["DOC_3"] is None
+
+
+def test_split_batch_response_com_texto_em_volta():
+    response = 'Segue:\n```json\n{"DOC_1": {"itens": []}}\n```'
+    assert json.loads(split_batch_response(response, ["DOC_1"])["DOC_1"]) == {"itens": []}
+
+
+def test_split_batch_response_invalida():
+    assert split_batch_response("sem json", ["DOC_1"]) == {"DOC_1": None}
+    assert split_batch_response("[1, 2]", ["DOC_1"]) == {"DOC_1": None}
+
+
+def _submit_all(batcher, texts):
+    results = [None] * len(texts)
+
+    def run(i):
+        results[i] = batcher.submit(texts[i], 10)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    return results
+
+
+def test_batcher_junta_e_separa_por_documento():
+    lotes = []
+
+    def send(texts):
+        lotes.append(dict(texts))
+        return {doc_id: json.dumps({"texto": text}) for doc_id, text in texts.items()}
+
+    batcher = SmallDocumentBatcher(send, max_tokens=1000, max_docs=3, max_wait=5)
+    texts = [f"doc {i}" for i in range(3)]
+    results = _submit_all(batcher, texts)
+    batcher.close()
+    assert [json.loads(r)["texto"] for r in results] == texts
+    assert len(lotes) == 1 and len(lotes[0]) == 3
+
+
+def test_batcher_documento_sozinho_volta_sem_resposta():
+    batcher = SmallDocumentBatcher(lambda texts: {}, max_tokens=1000, max_docs=5, max_wait=0.05)
+    assert batcher.submit("doc", 10) is None
+    batcher.close()
+
+
+def test_batcher_falha_no_envio_devolve_none():
+    def send(texts):
+        raise RuntimeError("API fora do ar")
+
+    batcher = SmallDocumentBatcher(send, max_tokens=1000, max_docs=2, max_wait=5)
+    assert _submit_all(batcher, ["a", "b"]) == [None, None]
+    batcher.close()
+
+
+def test_batcher_respeita_max_tokens():
+    tamanhos = []
+
+    def send(texts):
+        tamanhos.append(len(texts))
+        return {doc_id: "{}" for doc_id in texts}
+
+    batcher = SmallDocumentBatcher(send, max_tokens=20, max_docs=10, max_wait=0.2)
+    _submit_all(batcher, ["a", "b", "c", "d"])
+    batcher.close()
+    assert all(n <= 2 for n in tamanhos)
+
+
+def test_document_id():
+    assert document_id(3) == "DOC_3"
@@ -0,0 +1,109 @@
+# tests/test_chunking.py
+import json
+
+from chunking import chunk_header, merge_contract_jsons, split_text
+
+
+def _contrato(**campos):
+    doc = {
+        "numero_contrato": None,
+        "orgao_contratante": {"razao_social": None, "sigla": None, "cnpj": None},
+        "empresa_contratada": {"razao_social": None, "cnpj": None},
+        "itens": [],
+    }
+    doc.update(campos)
+    return json.dumps(doc)
+
+
+def _item(descricao, valor="R$ 10,00", **campos):
+    item = {"descricao": descricao, "catmat_catser": "123456", "quantidade": "1",
+            "valor_unitario": valor, "valor_total": valor}
+    item.update(campos)
+    return item
+
+
+def test_split_text_corta_no_inicio_das_clausulas():
+    text = "Preâmbulo\n" + "".join(f"CLÁUSULA {n}ª - TEXTO\n{'x' * 40}\n" for n in range(1, 6))
+    chunks = split_text(text, 120)
+    assert "".join(chunks) == text
+    assert all(len(c) <= 120 for c in chunks)
+    assert all(c.startswith("CLÁUSULA") for c in chunks[1:])
+
+
+def test_split_text_quebra_segmento_maior_que_o_limite():
+    text = "\n".join("linha %03d" % i for i in range(100))
+    chunks = split_text(text, 50)
+    assert "".join(chunks) == text
+    assert all(len(c) <= 50 for c in chunks)
+
+
+def test_split_text_linha_sem_quebra_e_cortada_a_forca():
+    chunks = split_text("a" * 250, 100)
+    assert [len(c) for c in chunks] == [100, 100, 50]
+
+
+def test_merge_vota_cabecalho_e_ignora_placeholders():
+    merged = json.loads(merge_contract_jsons([
+        _contrato(numero_contrato="XXXXXXXXX"),
+        _contrato(numero_contrato="12/2024"),
+        _contrato(numero_contrato="12/2024"),
+        _contrato(numero_contrato="21/2024"),
+    ]))
+    assert merged["numero_contrato"] == "12/2024"
+    assert merged["tipo_instrumento"] == "Contrato"
+    assert merged["fonte_preco"] == "Contrato"
+
+
+def test_merge_remove_itens_repetidos_e_completa_campos():
+    merged = json.loads(merge_contract_jsons([
+        _contrato(itens=[_item("Caneta"), _item("Papel A4", unidade_medida=None)]),
+        _contrato(itens=[_item("papel  a4", unidade_medida="RESMA"), _item("Toner")]),
+    ]))
+    assert [i["descricao"] for i in merged["itens"]] == ["Caneta", "Papel A4", "Toner"]
+    assert merged["itens"][1]["unidade_medida"] == "RESMA"
+
+
+def test_merge_mantem_itens_iguais_dentro_do_mesmo_trecho():
+    # Mesmo item entregue em dois locais: duas linhas legítimas do contrato
+    merged = json.loads(merge_contract_jsons([
+        _contrato(itens=[_item("Caneta", locais_execucao_entrega="Sede"),
+                         _item("Caneta", locais_execucao_entrega="Filial")]),
+        _contrato(itens=[_item("Toner")]),
+    ]))
+    assert [i["descricao"] for i in merged["itens"]] == ["Caneta", "Caneta", "Toner"]
+    assert [i["locais_execucao_entrega"] for i in merged["itens"][:2]] == ["Sede", "Filial"]
+
+
+def test_merge_so_remove_repetidos_na_borda_entre_trechos():
+    merged = json.loads(merge_contract_jsons([
+        _contrato(itens=[_item("Caneta"), _item("Papel")]),
+        _contrato(itens=[_item("Papel"), _item("Toner"), _item("Caneta")]),
+    ]))
+    assert [i["descricao"] for i in merged["itens"]] == ["Caneta", "Papel", "Toner", "Caneta"]
+
+
+def test_merge_escolhe_a_parte_pelo_cnpj_mais_votado():
+    orgao = {"razao_social": "Ministério da Saúde", "sigla": "MS", "cnpj": "00.394.544/0001-08"}
+    outro = {"razao_social": "Outro Órgão", "sigla": None, "cnpj": "11.111.111/0001-11"}
+    merged = json.loads(merge_contract_jsons([
+        _contrato(orgao_contratante=orgao),
+        _contrato(orgao_contratante=dict(orgao, sigla=None)),
+        _contrato(orgao_contratante=outro),
+    ]))
+    assert merged["orgao_contratante"] == orgao
+
+
+def test_merge_status_sucesso_so_com_documento_completo():
+    completo = _contrato(
+        numero_contrato="1/2024",
+        orgao_contratante={"razao_social": "A", "sigla": None, "cnpj": "00.394.544/0001-08"},
+        empresa_contratada={"razao_social": "B", "cnpj": "11.111.111/0001-11"},
+        itens=[_item("Caneta")],
+    )
+    assert json.loads(merge_contract_jsons([completo]))["status_extracao"] == "Sucesso"
+    assert json.loads(merge_contract_jsons([completo], partial=True))["status_extracao"] == "Parcial"
+    assert json.loads(merge_contract_jsons([_contrato(numero_contrato="1/2024")]))["status_extracao"] == "Parcial"
+
+
+def test_chunk_header_informa_posicao():
+    assert chunk_header(2, 5).startswith("[Trecho 2 de 5")
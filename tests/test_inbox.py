@@ -0,0 +1,69 @@
+# tests/test_inbox.py
+import os
+import time
+
+import pytest
+
+from inbox import InboxWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    w = InboxWatcher(str(tmp_path), debounce=0.3, poll_interval=0.05, use_inotify=False)
+    yield w
+    w.close()
+
+
+def test_arquivo_antigo_entregue_de_imediato(tmp_path, watcher):
+    path = tmp_path / "antigo.pdf"
+    path.write_bytes(b"%PDF")
+    os.utime(path, (time.time() - 60, time.time() - 60))
+    (tmp_path / "notas.txt").write_bytes(b"x")
+    assert watcher.poll(0.1) == [str(path)]
+    # Entregue uma vez enquanto continuar no diretório
+    assert watcher.poll(0.1) == []
+
+
+def test_arquivo_novo_espera_o_debounce(tmp_path, watcher):
+    path = tmp_path / "novo.pdf"
+    path.write_bytes(b"%PDF")
+    assert watcher.poll(0.1) == []
+    assert watcher.pending == 1
+    time.sleep(0.35)
+    assert watcher.poll(0.1) == [str(path)]
+    assert watcher.pending == 0
+
+
+def test_arquivo_crescendo_reinicia_o_debounce(tmp_path, watcher):
+    path = tmp_path / "gravando.pdf"
+    path.write_bytes(b"%PDF")
+    assert watcher.poll(0.1) == []
+    time.sleep(0.2)
+    with open(path, "ab") as f:
+        f.write(b"mais conteudo")
+    assert watcher.poll(0.1) == []
+    time.sleep(0.2)
+    # Ainda não completou o debounce desde a última mudança
+    assert watcher.poll(0.1) == []
+    time.sleep(0.2)
+    assert watcher.poll(0.1) == [str(path)]
+
+
+def test_arquivo_vazio_nao_e_entregue(tmp_path, watcher):
+    path = tmp_path / "vazio.pdf"
+    path.write_bytes(b"")
+    os.utime(path, (time.time() - 60, time.time() - 60))
+    assert watcher.poll(0.1) == []
+    assert watcher.pending == 1
+
+
+def test_arquivo_removido_e_recolocado_volta_a_ser_entregue(tmp_path, watcher):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF")
+    os.utime(path, (time.time() - 60, time.time() - 60))
+    assert watcher.poll(0.1) == [str(path)]
+    path.unlink()
+    assert watcher.poll(0.1) == []
+    path.write_bytes(b"%PDF-2")
+    os.utime(path, (time.time() - 60, time.time() - 60))
+    assert watcher.poll(0.1) == [str(path)]
@@ -0,0 +1,75 @@
+# tests/test_journal.py
+import threading
+
+import pytest
+
+from journal import JobJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    j = JobJournal(str(tmp_path / "journal.sqlite"))
+    yield j
+    j.close()
+
+
+def test_etapa_avanca_e_guarda_o_json(journal):
+    journal.record("h1", "a.pdf", "extracted", pdf_path="/in/a.pdf")
+    journal.record("h1", "a.pdf", "analyzed", extracted_json='{"itens": []}')
+    job = journal.get("h1")
+    assert job["stage"] == "analyzed"
+    assert job["pdf_path"] == "/in/a.pdf"
+    assert job["extracted_json"] == '{"itens": []}'
+
+
+def test_etapa_nao_regride(journal):
+    journal.record("h1", "a.pdf", "parsed", extracted_json="{}")
+    journal.record("h1", "a.pdf", "extracted")
+    journal.record("h1", "a.pdf", "analyzed")
+    assert journal.get("h1")["stage"] == "parsed"
+    assert journal.get("h1")["extracted_json"] == "{}"
+
+
+def test_etapa_nao_regride_com_threads(tmp_path):
+    path = str(tmp_path / "journal.sqlite")
+    JobJournal(path).record("h1", "a.pdf", "analyzed", extracted_json="{}")
+    journals = [JobJournal(path) for _ in range(8)]
+    threads = [
+        threading.Thread(target=j.record, args=("h1", "a.pdf", "extracted"))
+        for j in journals
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert journals[0].get("h1")["stage"] == "analyzed"
+
+
+def test_mark_persisted_usa_o_hash(journal):
+    journal.record("h1", "a.pdf", "parsed", extracted_json="{}")
+    journal.record("h2", "a.pdf", "parsed", extracted_json="{}")
+    journal.mark_persisted("h1")
+    assert journal.get("h1")["stage"] == "persisted"
+    assert journal.get("h2")["stage"] == "parsed"
+
+
+def test_record_error_nao_muda_a_etapa(journal):
+    journal.record_error("h1", "a.pdf", "falhou")
+    assert journal.get("h1")["stage"] == "failed"
+    journal.record("h2", "b.pdf", "analyzed", extracted_json="{}")
+    journal.record_error("h2", "b.pdf", "banco fora do ar")
+    job = journal.get("h2")
+    assert (job["stage"], job["error"]) == ("analyzed", "banco fora do ar")
+    # Depois de uma falha, o documento pode voltar ao fluxo
+    journal.record("h1", "a.pdf", "extracted")
+    assert journal.get("h1")["stage"] == "extracted"
+
+
+def test_pending_after_analysis(journal):
+    journal.record("h1", "a.pdf", "analyzed", extracted_json="{}")
+    journal.record("h2", "b.pdf", "parsed", extracted_json="{}")
+    journal.record("h3", "c.pdf", "extracted")
+    journal.record("h4", "d.pdf", "ignored")
+    journal.record("h5", "e.pdf", "parsed", extracted_json="{}")
+    journal.mark_persisted("h5")
+    assert [job["content_hash"] for job in journal.pending_after_analysis()] == ["h1", "h2"]
@@ -0,0 +1,47 @@
+# tests/test_llm_cache.py
+import llm_cache
+from llm_cache import LLMResponseCache
+
+
+def _cache(tmp_path, ttl=3600, max_bytes=10 ** 9):
+    return LLMResponseCache(str(tmp_path / "llm.sqlite"), ttl_seconds=ttl, max_bytes=max_bytes)
+
+
+def test_make_key_depende_do_prompt_modelo_e_config():
+    key = LLMResponseCache.make_key("prompt", "modelo", {"temperature": 0, "top_k": 40})
+    assert key == LLMResponseCache.make_key("prompt", "modelo", {"top_k": 40, "temperature": 0})
+    assert key != LLMResponseCache.make_key("prompt", "outro", {"temperature": 0, "top_k": 40})
+    assert key != LLMResponseCache.make_key("prompt", "modelo", {"temperature": 1, "top_k": 40})
+    assert key != LLMResponseCache.make_key("outro", "modelo", {"temperature": 0, "top_k": 40})
+
+
+def test_put_e_get(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get("k") is None
+    cache.put("k", '{"itens": []}')
+    assert cache.get("k") == '{"itens": []}'
+
+
+def test_entrada_expirada(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, ttl=60)
+    cache.put("k", "resposta")
+    agora = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, "time", lambda: agora + 61)
+    assert cache.get("k") is None
+
+
+def test_evict_remove_as_menos_usadas(tmp_path, monkeypatch):
+    cache = _cache(tmp_path)
+    relogio = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: relogio[0])
+    for key in ("a", "b", "c", "d"):
+        relogio[0] += 1
+        cache.put(key, "x" * 100)
+    relogio[0] += 1
+    cache.get("a")  # "a" passa a ser a mais recente
+    cache.max_bytes = 250
+    cache.evict()
+    assert cache.get("b") is None
+    assert cache.get("c") is None
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None
@@ -0,0 +1,339 @@
+# tests/test_repo.py
+import io
+import json
+import math
+
+import pytest
+
+from benchmarks.stubs import FakeConnection, FakeCursor
+from repo import (
+    PRECOS_PREPARED_STATEMENTS, ContractParser, ContractRepository, Contrato, EmpresaContratada,
+    Item, ItemBatch, LRUCache, OrgaoContratante, PrecosWriter, parse_decimal_br,
+)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("R$ 1.234,56", 1234.56),
+    ("1234,5", 1234.5),
+    ("10", 10.0),
+    ("1.000", 1000.0),
+    ("R$ 1.000", 1000.0),
+    ("1.234.567", 1234567.0),
+    ("1.234.567,89", 1234567.89),
+    ("-2.500", -2500.0),
+    ("1.5", 1.5),
+    ("12.34", 12.34),
+    ("0.500", 0.5),
+    ("R$ 0,99", 0.99),
+    (3, 3.0),
+    (2.5, 2.5),
+])
+def test_parse_decimal_br(value, expected):
+    assert parse_decimal_br(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", [None, "", "R$", "N/A", "não informado"])
+def test_parse_decimal_br_sem_numero(value):
+    assert parse_decimal_br(value) is None
+
+
+def test_lru_cache_descarta_o_menos_usado():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_lru_cache_put_atualiza_e_pop():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+    cache.pop("a")
+    cache.pop("inexistente")
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def _item(descricao, quantidade, valor_unitario, valor_total, unidade="UN"):
+    return Item(descricao, None, unidade, quantidade, valor_unitario, valor_total,
+                "123456", "Material", None)
+
+
+def _contrato(numero, itens):
+    return Contrato(numero, "Contrato", None, None, "Contrato", numero, None, "Sucesso",
+                    OrgaoContratante("Órgão", "ORG", "00.394.544/0001-08"),
+                    EmpresaContratada("Empresa", "11.111.111/0001-11"), itens)
+
+
+def test_item_batch_add_items():
+    batch = ItemBatch()
+    batch.add_items(_contrato("1/2024", [_item("Papel", "1.000", "R$ 2,50", "R$ 2.500,00")]))
+    batch.add_items(_contrato("2/2024", [_item("Caneta", "10", None, "N/A"),
+                                         _item("Toner", "3", "R$ 1.200,00", "R$ 3.600,00")]))
+    assert len(batch) == 3
+    assert batch.contratos == ["1/2024", "2/2024"]
+    assert list(batch.contrato_idx) == [0, 1, 1]
+    assert list(batch.quantidade) == [1000.0, 10.0, 3.0]
+    assert list(batch.valor_total[i] for i in (0, 2)) == [2500.0, 3600.0]
+    assert math.isnan(batch.valor_unitario[1])
+
+
+def test_item_batch_item_reconstroi():
+    batch = ItemBatch()
+    batch.add_items(_contrato("1/2024", [_item("Caneta", "10", None, "R$ 15,00")]))
+    item = batch.item(0)
+    assert (item.descricao, item.unidade_medida, item.tipo) == ("Caneta", "UN", "Material")
+    assert float(item.quantidade) == 10.0
+    assert item.valor_unitario is None
+    assert float(item.valor_total) == 15.0
+
+
+def test_parse_into_batch():
+    batch = ItemBatch()
+    idx = ContractParser.parse_into_batch(json.dumps({
+        "numero_contrato": "7/2024",
+        "itens": [{"descricao": "Cadeira", "quantidade": "2", "valor_unitario": "R$ 1.000",
+                   "valor_total": "R$ 2.000,00", "unidade_medida": "UN"}],
+    }), batch)
+    assert idx == 0
+    assert batch.contratos == ["7/2024"]
+    assert list(batch.valor_unitario) == [1000.0]
+    assert batch.tipo == ["Material"]
+
+
+def _contrato_json(numero, **extra):
+    return json.dumps({"numero_contrato": numero,
+                       "itens": [{"descricao": "Papel", "quantidade": "2"}], **extra})
+
+
+def test_parse_many_diretorio(tmp_path):
+    (tmp_path / "b_extracted.json").write_text(_contrato_json("2/2024"), encoding="utf-8")
+    (tmp_path / "a_extracted.json").write_text(_contrato_json("1/2024"), encoding="utf-8")
+    (tmp_path / "notas.txt").write_text("não é contrato", encoding="utf-8")
+    contratos = list(ContractParser.parse_many(str(tmp_path), pattern="*_extracted.json"))
+    assert [c.numero_contrato for c in contratos] == ["1/2024", "2/2024"]
+    assert contratos[0].itens[0].descricao == "Papel"
+
+
+def test_parse_many_jsonl_e_bytes(tmp_path):
+    jsonl = tmp_path / "lote.jsonl"
+    jsonl.write_text(f"{_contrato_json('1/2024')}\n\n{_contrato_json('2/2024')}\n", encoding="utf-8")
+    assert [c.numero_contrato for c in ContractParser.parse_many(str(jsonl))] == ["1/2024", "2/2024"]
+
+    lista = f"[{_contrato_json('3/2024')}, {_contrato_json('4/2024')}]".encode("utf-8")
+    assert [c.numero_contrato for c in ContractParser.parse_many(lista)] == ["3/2024", "4/2024"]
+    linhas = jsonl.read_bytes()
+    assert [c.numero_contrato for c in ContractParser.parse_many(linhas)] == ["1/2024", "2/2024"]
+    arquivo = io.BytesIO(linhas)
+    assert [c.numero_contrato for c in ContractParser.parse_many(arquivo)] == ["1/2024", "2/2024"]
+
+
+def test_parse_many_lista_de_caminhos(tmp_path):
+    paths = []
+    for numero in ("1/2024", "2/2024"):
+        path = tmp_path / f"{numero.replace('/', '_')}.json"
+        path.write_text(_contrato_json(numero), encoding="utf-8")
+        paths.append(str(path))
+    assert [c.numero_contrato for c in ContractParser.parse_many(paths)] == ["1/2024", "2/2024"]
+
+
+def test_parse_many_skip_errors(tmp_path):
+    (tmp_path / "a.json").write_text(_contrato_json("1/2024"), encoding="utf-8")
+    (tmp_path / "b.json").write_text("{quebrado", encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(ContractParser.parse_many(str(tmp_path)))
+    contratos = list(ContractParser.parse_many(str(tmp_path), skip_errors=True))
+    assert [c.numero_contrato for c in contratos] == ["1/2024"]
+    linhas = [_contrato_json("1/2024"), "não é json", _contrato_json("2/2024")]
+    contratos = list(ContractParser.parse_many(linhas, skip_errors=True))
+    assert [c.numero_contrato for c in contratos] == ["1/2024", "2/2024"]
+
+
+class _ScriptedCursor:
+    """Cursor que guarda o SQL executado e devolve as linhas roteirizadas, em ordem."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(" ".join(sql.split()))
+
+    def fetchone(self):
+        return self.conn.results.pop(0)
+
+    def fetchall(self):
+        return self.conn.results.pop(0)
+
+
+class _ScriptedConnection:
+    def __init__(self, results):
+        self.results = list(results)
+        self.executed = []
+
+    def cursor(self):
+        return _ScriptedCursor(self)
+
+
+def test_insert_orgao_le_de_novo_o_id_quando_outro_processo_insere_antes(monkeypatch, caplog):
+    monkeypatch.setattr(ContractRepository, "_party_indexes_checked", False)
+    conn = _ScriptedConnection([
+        [],          # verificação de índices: nenhum índice único em cnpj
+        (None,),     # SELECT: CNPJ ainda não existe
+        None,        # INSERT ... ON CONFLICT DO NOTHING: conflito, nenhuma linha
+        (7,),        # SELECT de novo: id gravado pelo outro processo
+    ])
+    repository = ContractRepository(conn)
+    orgao = OrgaoContratante("Órgão", "ORG", "00.394.544/0001-08")
+    assert repository.insert_orgao_contratante(orgao) == 7
+    assert "ON CONFLICT DO NOTHING" in conn.executed[2]
+    assert not any("DO UPDATE" in sql for sql in conn.executed)
+    assert "Sem índice único em cnpj" in caplog.text
+    # Segunda chamada: cache, sem ir ao banco nem verificar os índices de novo
+    assert repository.insert_orgao_contratante(orgao) == 7
+    assert len(conn.executed) == 4
+
+
+def test_insert_empresa_existente_nao_insere(monkeypatch):
+    monkeypatch.setattr(ContractRepository, "_party_indexes_checked", True)
+    conn = _ScriptedConnection([(3,)])
+    repository = ContractRepository(conn)
+    assert repository.insert_empresa_contratada(EmpresaContratada("Empresa", "11.111.111/0001-11")) == 3
+    assert len(conn.executed) == 1 and conn.executed[0].startswith("SELECT min(id)")
+
+
+class _PrecosCursor(FakeCursor):
+    """FakeCursor com mogrify; falha nos comandos que citam um número de `fail_on`."""
+
+    def mogrify(self, sql, params):
+        return (sql % tuple(repr(p) for p in params)).encode("utf-8")
+
+    def execute(self, sql, params=None):
+        import psycopg2
+
+        super().execute(sql, params)
+        text = sql.decode("utf-8") if isinstance(sql, bytes) else sql
+        self.conn.executed.append(text)
+        if self.conn.closed:
+            raise psycopg2.InterfaceError("connection already closed")
+        if any(numero in text for numero in self.conn.drop_on):
+            self.conn.closed = 1
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        if any(numero in text for numero in self.conn.fail_on):
+            raise psycopg2.DataError("valor inválido")
+
+
+class _PrecosConnection(FakeConnection):
+    def __init__(self):
+        super().__init__()
+        self.executed = []
+        self.fail_on = set()
+        self.drop_on = set()
+
+    def cursor(self):
+        return _PrecosCursor(self)
+
+    def rollback(self):
+        import psycopg2
+
+        if self.closed:
+            raise psycopg2.InterfaceError("connection already closed")
+        super().rollback()
+
+
+class _FakeConnectionPool:
+    def __init__(self, minconn, maxconn, **dsn):
+        self.idle = []
+        self.created = []
+        self.discarded = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        conn = _PrecosConnection()
+        self.created.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.discarded.append(conn)
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        pass
+
+
+@pytest.fixture
+def precos_writer(monkeypatch):
+    pool_module = pytest.importorskip("psycopg2.pool")
+    monkeypatch.setattr(pool_module, "ThreadedConnectionPool", _FakeConnectionPool)
+    return lambda pipeline_size=1: PrecosWriter(pipeline_size=pipeline_size)
+
+
+def _prepares(conn):
+    return sum(1 for sql in conn.executed if "PREPARE" in sql and "EXECUTE" not in sql)
+
+
+def test_precos_writer_prepara_uma_vez_por_conexao(precos_writer):
+    writer = precos_writer()
+    assert writer.write(_contrato("1/2024", []), "a.pdf") is True
+    assert writer.write(_contrato("2/2024", []), "b.pdf") is True
+    (conn,) = writer.pool.created
+    assert _prepares(conn) == len(PRECOS_PREPARED_STATEMENTS)
+    assert sum(1 for sql in conn.executed if "EXECUTE precos_insert_contrato" in sql) == 2
+
+
+def test_precos_writer_grupo_com_erro_refeito_contrato_a_contrato(precos_writer):
+    writer = precos_writer(pipeline_size=3)
+    conn = writer.pool.getconn()
+    conn.fail_on.add("2/2024")
+    writer.pool.putconn(conn)
+    results = {}
+    for numero, filename in (("1/2024", "a.pdf"), ("2/2024", "a.pdf"), ("3/2024", "c.pdf")):
+        results.update(writer.add(_contrato(numero, []), filename, key=(filename, numero)))
+    # Mesmo filename em dois documentos: a chave os distingue
+    assert results == {("a.pdf", "1/2024"): True, ("a.pdf", "2/2024"): False,
+                       ("c.pdf", "3/2024"): True}
+    assert conn.rollbacks == 2  # o grupo e o contrato ruim
+    assert writer.pool.discarded == []
+
+
+def test_precos_writer_checkout_descarta_conexao_se_prepare_falha(precos_writer):
+    writer = precos_writer()
+    conn = writer.pool.getconn()
+    conn.fail_on.add("precos_upsert_empresa")
+    writer.pool.putconn(conn)
+    with pytest.raises(Exception):
+        writer.write(_contrato("1/2024", []), "a.pdf")
+    assert writer.pool.discarded == [conn]
+    assert writer._prepared == {}
+    # A próxima gravação usa uma conexão nova, preparada do zero
+    assert writer.write(_contrato("1/2024", []), "a.pdf") is True
+    assert _prepares(writer.pool.created[-1]) == len(PRECOS_PREPARED_STATEMENTS)
+
+
+def test_precos_writer_conexao_perdida_marca_o_restante_como_falha(precos_writer):
+    writer = precos_writer(pipeline_size=2)
+    conn = writer.pool.getconn()
+    conn.drop_on.add("2/2024")
+    writer.pool.putconn(conn)
+    contratos = [(_contrato(f"{n}/2024", []), f"{n}.pdf") for n in range(1, 6)]
+    results = writer.write_many(contratos)
+    assert results == {"1.pdf": False, "2.pdf": False, "3.pdf": False,
+                       "4.pdf": False, "5.pdf": False}
+    assert writer.pool.discarded == [conn]
+    assert id(conn) not in writer._prepared
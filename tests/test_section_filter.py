@@ -0,0 +1,43 @@
+# tests/test_section_filter.py
+from section_filter import OMITTED_MARKER, filter_relevant_sections
+
+BOILERPLATE = "CLÁUSULA DAS OBRIGAÇÕES: a contratada cumprirá a Lei nº 14.133 e casos omissos.\n"
+
+
+def _documento():
+    return (
+        "CONTRATO Nº 12/2024\n"
+        + BOILERPLATE * 40
+        + "CONTRATADA: Empresa Alfa Ltda, inscrita no CNPJ sob o nº 12.345.678/0001-90\n"
+        + BOILERPLATE * 40
+        + "Item 1: Caneta | Quantidade: 10 | Valor unitário: R$ 1,50 | Valor total: R$ 15,00\n"
+        + BOILERPLATE * 40
+        + "Documento assinado eletronicamente em 10/05/2024.\n"
+    )
+
+
+def test_mantem_secoes_relevantes_e_descarta_clausulas_padrao():
+    text = _documento()
+    filtered, stats = filter_relevant_sections(text, head_chars=30, tail_chars=60)
+    assert "CONTRATO Nº 12/2024" in filtered
+    assert "12.345.678/0001-90" in filtered
+    assert "Valor total: R$ 15,00" in filtered
+    assert "Documento assinado eletronicamente" in filtered
+    assert OMITTED_MARKER in filtered
+    assert stats["chars_total"] == len(text)
+    assert stats["chars_kept"] + stats["chars_dropped"] == len(text)
+    assert stats["chars_kept"] < len(text) // 4
+
+
+def test_mantem_vizinhos_do_bloco_relevante():
+    text = _documento()
+    filtered, _ = filter_relevant_sections(text, head_chars=30, tail_chars=60, context=1)
+    linha = "CONTRATADA: Empresa Alfa Ltda, inscrita no CNPJ sob o nº 12.345.678/0001-90\n"
+    assert BOILERPLATE + linha + BOILERPLATE in filtered
+
+
+def test_texto_curto_fica_inteiro_no_cabecalho():
+    text = BOILERPLATE * 3
+    filtered, stats = filter_relevant_sections(text, head_chars=10_000)
+    assert filtered == text
+    assert stats["chars_dropped"] == 0
@@ -0,0 +1,46 @@
+# tests/test_text_cache.py
+import hashlib
+import os
+import time
+
+from text_cache import TextCache, sha256_file
+
+
+def test_sha256_file(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4 conteudo" * 1000)
+    assert sha256_file(str(path), chunk_size=100) == hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_put_e_get(tmp_path):
+    cache = TextCache(str(tmp_path))
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, "Contrato nº 1 — texto com acentuação")
+    assert cache.get("ab" * 32) == "Contrato nº 1 — texto com acentuação"
+
+
+def test_entrada_corrompida_e_removida(tmp_path):
+    cache = TextCache(str(tmp_path))
+    key = "cd" * 32
+    cache.put(key, "texto")
+    with open(cache._path(key), "wb") as f:
+        f.write(b"lixo")
+    assert cache.get(key) is None
+    assert not os.path.exists(cache._path(key))
+
+
+def test_evict_remove_as_menos_usadas(tmp_path):
+    cache = TextCache(str(tmp_path), max_bytes=10 ** 9)
+    keys = [f"{i:02d}" * 32 for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.put(key, os.urandom(2000).hex())
+        # Último acesso em ordem crescente: keys[0] é a menos usada
+        stamp = time.time() - 100 + i
+        os.utime(cache._path(key), (stamp, stamp))
+    size = os.path.getsize(cache._path(keys[0]))
+    cache.max_bytes = int(size * 3.2)
+    cache.evict()
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+    assert cache.get(keys[3]) is not None
@@ -0,0 +1,315 @@
+# tests/test_worker.py
+import asyncio
+import copy
+import threading
+import time
+
+import pytest
+
+import metrics
+import worker
+from mock_gemini import MockSettings, start_mock_server
+from worker import (
+    CONFIG, GeminiClient, LatencyTracker, LLMRateLimitError, LLMServerError, TokenBucket,
+    estimate_tokens,
+)
+
+
+def test_token_bucket_rajada_inicial_sem_espera():
+    bucket = TokenBucket(per_minute=60)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(60):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) < 0.1
+
+
+def test_token_bucket_espera_reposicao():
+    # 600/min = 10 por segundo: esgotada a rajada, 3 unidades levam ~0,3 s
+    bucket = TokenBucket(per_minute=600)
+
+    async def run():
+        await bucket.acquire(600)
+        start = time.monotonic()
+        await bucket.acquire(3)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) == pytest.approx(0.3, abs=0.15)
+
+
+def test_token_bucket_pedido_maior_que_a_capacidade():
+    # Um prompt maior que a cota de um minuto espera a cota cheia, sem travar
+    bucket = TokenBucket(per_minute=6000)
+
+    async def run():
+        await bucket.acquire(10 ** 6)
+        return bucket.tokens
+
+    assert asyncio.run(run()) == pytest.approx(0.0, abs=1.0)
+
+
+def test_token_bucket_set_rate_limita_o_saldo():
+    bucket = TokenBucket(per_minute=600)
+    bucket.set_rate(60)
+    assert (bucket.capacity, bucket.rate) == (60.0, 1.0)
+    assert bucket.tokens == pytest.approx(60.0)
+
+
+def _mock_config(**rate_limit):
+    config = copy.deepcopy(CONFIG)
+    config['gemini']['backend'] = 'mock'
+    config['gemini']['rate_limit'].update(rate_limit)
+    return config
+
+
+def test_gemini_client_reparte_a_cota_quando_entram_workers(monkeypatch):
+    counts = iter([1, 4])
+    monkeypatch.setattr(worker, "_cluster_process_count", lambda: next(counts))
+    client = GeminiClient(_mock_config(rpm=1200, tpm=4000, processes=None, recount_interval=60))
+    try:
+        assert client.rpm == 1200
+        client._maybe_recount()  # dentro do intervalo: não reconta
+        assert client.processes == 1
+        client._counted_at -= 60
+        client._maybe_recount()
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), client._loop).result()
+        assert (client.processes, client.rpm, client.tpm) == (4, 300, 1000)
+        assert client._request_bucket.capacity == 300
+        assert client._token_bucket.capacity == 1000
+    finally:
+        client.close()
+
+
+def test_gemini_client_com_processos_fixos_nao_reconta(monkeypatch):
+    monkeypatch.setattr(worker, "_cluster_process_count", lambda: pytest.fail("recontou"))
+    client = GeminiClient(_mock_config(rpm=1200, processes=None), processes=2)
+    try:
+        client._counted_at -= 3600
+        client._maybe_recount()
+        assert client.rpm == 600
+    finally:
+        client.close()
+
+
+def test_latency_tracker_quantil_so_com_amostras_suficientes():
+    tracker = LatencyTracker(window=10, min_samples=5)
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        tracker.observe(100, seconds)
+    assert tracker.quantile(100, 0.5) is None
+    tracker.observe(100, 0.5)
+    assert tracker.quantile(100, 0.5) == 0.3
+    assert tracker.quantile(100, 0.99) == 0.5
+    # Outra faixa de tamanho (>= 1024 tokens) tem amostras próprias
+    assert tracker.quantile(5000, 0.5) is None
+    for _ in range(10):
+        tracker.observe(100, 1.0)
+    assert tracker.quantile(100, 0.0) == 1.0  # janela guarda só as 10 últimas
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**settings):
+        server, _ = start_mock_server(MockSettings(latency_median=0.01, latency_sigma=0.0, **settings),
+                                      port=0)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_client():
+    clients = []
+
+    def make(url="http://127.0.0.1:9", max_attempts=3, deadline=None, hedging=None):
+        config = _mock_config(processes=None)
+        config['gemini']['mock']['url'] = url
+        config['gemini']['retry'].update(max_attempts=max_attempts, base_delay=0.01, max_delay=0.02)
+        config['gemini']['deadline'].update(deadline or {})
+        config['gemini']['hedging'].update(hedging or {})
+        client = GeminiClient(config, processes=1)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_attempt_timeout_limitado_por_min_timeout_e_teto(make_client):
+    client = make_client(deadline={'min_timeout': 1.0, 'multiplier': 3.0, 'min_samples': 3})
+    assert client.attempt_timeout(10, 5.0) == 5.0  # sem amostras: o teto
+    for _ in range(3):
+        client.latencies.observe(10, 0.1)
+    assert client.attempt_timeout(10, 5.0) == 1.0  # 0.1 * 3 < min_timeout
+    for _ in range(3):
+        client.latencies.observe(10, 2.0)
+    assert client.attempt_timeout(10, 5.0) == 5.0  # 2.0 * 3 > teto
+    client.deadline['enabled'] = False
+    assert client.attempt_timeout(10, 0.5) == 0.5
+
+
+@pytest.mark.parametrize("settings, error", [
+    ({'rate_429': 1.0}, LLMRateLimitError),
+    ({'rate_500': 1.0}, LLMServerError),
+    ({'stall_rate': 1.0, 'stall_seconds': 1.0}, asyncio.TimeoutError),
+])
+def test_desiste_depois_de_max_attempts(mock_server, make_client, settings, error):
+    client = make_client(mock_server(**settings), max_attempts=3)
+    with pytest.raises(error):
+        client.generate("contrato", timeout=0.2)
+    assert client.stats['retries'] == 2
+    assert client.stats['timeouts'] == (3 if error is asyncio.TimeoutError else 0)
+
+
+def test_nova_tentativa_depois_de_429(make_client, monkeypatch):
+    client = make_client(max_attempts=3)
+    calls = []
+
+    def flaky(prompt, timeout):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise LLMRateLimitError("HTTP 429")
+        return '{"ok": true}'
+
+    monkeypatch.setattr(client, "_mock_request", flaky)
+    assert client.generate("contrato", timeout=1.0) == '{"ok": true}'
+    assert len(calls) == 2 and client.stats['retries'] == 1
+
+
+def _slow_primary(release):
+    """_mock_request cuja primeira chamada só volta com `release`; as demais respondem na hora."""
+    calls = []
+
+    def request(prompt, timeout):
+        calls.append(prompt)
+        if len(calls) == 1:
+            release.wait(5)
+            return "primaria"
+        return "duplicada"
+
+    return request, calls
+
+
+def _pending_tasks(client):
+    async def count():
+        return len([t for t in asyncio.all_tasks() if t is not asyncio.current_task()])
+    return asyncio.run_coroutine_threadsafe(count(), client._loop).result()
+
+
+def test_hedge_vence_e_cancela_a_primaria(make_client, monkeypatch):
+    client = make_client(hedging={'enabled': True, 'quantile': 0.5, 'max_ratio': 1.0},
+                         deadline={'min_samples': 5, 'min_timeout': 2.0})
+    assert client._http._max_workers == 2 * client.max_in_flight
+    for _ in range(5):
+        client.latencies.observe(estimate_tokens("contrato"), 0.05)
+    release = threading.Event()
+    request, calls = _slow_primary(release)
+    monkeypatch.setattr(client, "_mock_request", request)
+    try:
+        assert client.generate("contrato", timeout=5.0) == "duplicada"
+        assert len(calls) == 2
+        assert (client.stats['hedges'], client.stats['hedge_wins']) == (1, 1)
+        assert _pending_tasks(client) == 0
+    finally:
+        release.set()
+
+
+def test_hedge_respeita_max_ratio(make_client, monkeypatch):
+    client = make_client(hedging={'enabled': True, 'quantile': 0.5, 'max_ratio': 0.0},
+                         deadline={'min_samples': 5, 'min_timeout': 2.0})
+    for _ in range(5):
+        client.latencies.observe(estimate_tokens("contrato"), 0.05)
+    release = threading.Event()
+    request, calls = _slow_primary(release)
+    monkeypatch.setattr(client, "_mock_request", request)
+    threading.Timer(0.3, release.set).start()
+    assert client.generate("contrato", timeout=5.0) == "primaria"
+    assert len(calls) == 1
+    assert client.stats['hedges'] == 0
+
+
+class _CheckedConnection:
+    """Conexão substituta para o health check: `alive` decide se o SELECT 1 passa."""
+
+    def __init__(self, alive):
+        self.alive = alive
+        self.closed = 0
+        self.autocommit = True
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if not conn.alive:
+                    raise OSError("server closed the connection unexpectedly")
+
+        return Cursor()
+
+    def rollback(self):
+        pass
+
+
+class _FakePool:
+    def __init__(self, conns):
+        self.conns = list(conns)
+        self.returned = []
+
+    def getconn(self):
+        return self.conns.pop(0)
+
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+
+
+def test_connection_descarta_conexoes_mortas_ate_achar_uma_viva(monkeypatch):
+    resources = worker.WorkerResources(CONFIG)
+    dead, alive = _CheckedConnection(False), _CheckedConnection(True)
+    pool = _FakePool([dead, alive])
+    monkeypatch.setattr(resources, "_get_pool", lambda: pool)
+    with resources.connection() as conn:
+        assert conn is alive and conn.autocommit is False
+    assert pool.returned == [(dead, True), (alive, False)]
+
+
+def test_connection_desiste_depois_de_checkout_attempts(monkeypatch):
+    resources = worker.WorkerResources(CONFIG)
+    pool = _FakePool([_CheckedConnection(False) for _ in range(5)])
+    calls = []
+    monkeypatch.setattr(resources, "_get_pool", lambda: calls.append(1) or pool)
+    with pytest.raises(ConnectionError):
+        with resources.connection():
+            pass
+    attempts = CONFIG['database']['checkout_attempts']
+    assert len(calls) == attempts
+    assert [close for _, close in pool.returned] == [True] * attempts
+
+
+def test_map_chunks_registra_os_spans_dos_trechos_no_documento(monkeypatch):
+    def analyze_chunk(chunk_text):
+        with metrics.span('llm_call', chars=len(chunk_text)):
+            time.sleep(0.01)
+        return chunk_text, True
+
+    monkeypatch.setattr(worker, "analyze_chunk", analyze_chunk)
+    recorder = metrics.SpanRecorder([{'name': 'extract'}])
+    chunks = [f"trecho {i}" for i in range(12)]
+    with recorder.activate():
+        results = worker._map_chunks(chunks)
+    assert results == [(chunk, True) for chunk in chunks]
+    assert sorted(s['name'] for s in recorder.spans) == ['extract'] + ['llm_call'] * 12
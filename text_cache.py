@@ -0,0 +1,144 @@
+# text_cache.py
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from typing import Optional
+
+logger = logging.getLogger("TextCache")
+
+# Diretório local do nó: todos os workers da máquina compartilham o mesmo cache
+CACHE_DIR = "/tmp/pdf_text_cache"
+# Tamanho máximo (bytes comprimidos) antes de aplicar a remoção LRU
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Calcula o SHA-256 do conteúdo do arquivo, lendo em blocos."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TextCache:
+    """
+    Cache em disco do texto extraído de PDFs, endereçado pelo SHA-256 dos bytes do PDF.
+    O texto é gravado comprimido (zlib), um arquivo por documento, com escrita atômica,
+    de modo que vários processos do mesmo nó possam ler e gravar ao mesmo tempo.
+    A data de modificação de cada arquivo é atualizada a cada leitura e serve como
+    marca de último acesso para a remoção LRU quando o cache passa de max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Bytes gravados por este processo desde a última varredura de tamanho
+        self._written_since_check = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".txt.z")
+
+    def get(self, key: str) -> Optional[str]:
+        """Retorna o texto em cache para o hash, ou None se não existir."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            text = zlib.decompress(data).decode('utf-8')
+        except (zlib.error, UnicodeDecodeError):
+            logger.warning(f"Entrada de cache corrompida, removendo: {path}")
+            self._remove(path)
+            return None
+
+        # Marca o acesso para a política LRU
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key: str, text: str):
+        """Grava o texto comprimido no cache (substitui a entrada, se existir)."""
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        data = zlib.compress(text.encode('utf-8'), 6)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            self._remove(temp_path)
+            raise
+
+        with self._lock:
+            self._written_since_check += len(data)
+            # Varre o diretório só depois de gravar uma fração relevante do limite
+            must_check = self._written_since_check >= self.max_bytes // 20
+            if must_check:
+                self._written_since_check = 0
+        if must_check:
+            self.evict()
+
+    def evict(self):
+        """Remove as entradas menos recentemente usadas até ficar abaixo de 90% do limite."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".txt.z"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if self._remove(path):
+                total -= size
+                removed += 1
+        logger.info(f"Cache de texto: {removed} entrada(s) removida(s) (LRU).")
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> TextCache:
+    """Instância compartilhada do cache para o processo atual."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TextCache()
+        return _default_cache